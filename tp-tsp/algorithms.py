@@ -0,0 +1,52 @@
+"""Este modulo define el registro de algoritmos.
+
+ALGORITHMS asocia el nombre de cada algoritmo (el que se usa en la linea de
+comandos, por ejemplo en --budget ALGO=SEGUNDOS) con su constructor. Lo usan
+main.py y bench.py; este modulo no importa el codigo de graficos, de modo
+que el benchmark se puede ejecutar sin matplotlib.
+"""
+
+from __future__ import annotations
+import search
+
+# Algoritmos involucrados
+HILL_CLIMBING = "hill"
+FIRST_IMPROVEMENT = "first"
+HILL_CLIMBING_RANDOM_RESET = "hill_reset"
+TABU_SEARCH = "tabu"
+LIN_KERNIGHAN = "lk"
+ITERATED_LOCAL_SEARCH = "ils"
+SIMULATED_ANNEALING = "sa"
+HELD_KARP = "hk"
+BRANCH_AND_BOUND = "bnb"
+
+# Constructores de los algoritmos, por nombre. Reciben una semilla (o None)
+# que usan los algoritmos aleatorizados. Para agregar un algoritmo alcanza con
+# registrarlo aca: lo usan main() y el benchmark (ver bench.py)
+ALGORITHMS = {HILL_CLIMBING: lambda seed: search.HillClimbing(),
+              FIRST_IMPROVEMENT: lambda seed: search.FirstImprovement(),
+              HILL_CLIMBING_RANDOM_RESET: lambda seed: search.HillClimbingReset(seed=seed),
+              TABU_SEARCH: lambda seed: search.Tabu(),
+              LIN_KERNIGHAN: lambda seed: search.LinKernighan(),
+              ITERATED_LOCAL_SEARCH: lambda seed: search.IteratedLocalSearch(seed=seed),
+              SIMULATED_ANNEALING: lambda seed: search.SimulatedAnnealing(seed=seed),
+              HELD_KARP: lambda seed: search.HeldKarp(),
+              BRANCH_AND_BOUND: lambda seed: search.BranchAndBound(time_limit=30)}
+ALGO_NAMES = list(ALGORITHMS)
+
+
+def apply_budget(algo: search.LocalSearch, seconds: float | None) -> None:
+    """Limita el tiempo de un algoritmo a un presupuesto.
+
+    Si el algoritmo ya tiene un time_limit menor (como BranchAndBound en
+    ALGORITHMS) se conserva.
+
+    Argumentos:
+    ==========
+    algo: LocalSearch
+        un algoritmo
+    seconds: float | None
+        presupuesto en segundos, o None para no cambiar nada
+    """
+    if seconds is not None and (algo.time_limit is None or seconds < algo.time_limit):
+        algo.time_limit = seconds
@@ -0,0 +1,227 @@
+"""Este modulo se encarga del benchmark de los algoritmos.
+
+Resuelve cada instancia con cada algoritmo registrado en
+algorithms.ALGORITHMS y con varias semillas, sin graficar (no importa
+matplotlib), y registra por corrida el tiempo, las iteraciones, las
+evaluaciones del objetivo y el gap (en %) respecto del optimo conocido de
+TSPLIB (ver OPTIMA).
+
+* La semilla se usa para construir un tour inicial aleatorizado (ver
+construct.build()) y en los algoritmos aleatorizados, asi cada corrida se
+puede repetir.
+
+* Los resultados se escriben como JSON (corridas y resumen por instancia y
+algoritmo) o CSV (una fila por corrida).
+
+* El resumen se puede comparar con el JSON de una corrida anterior: hay una
+regresion si el gap medio aumenta mas de gap_tol puntos o el tiempo medio se
+multiplica por mas de time_tol.
+
+Uso: python bench.py [instancias.tsp ...] --seeds 5 --json bench.json
+--baseline baseline.json
+"""
+
+from __future__ import annotations
+import csv
+import json
+from pathlib import Path
+from random import Random
+import sys
+import numpy as np
+import algorithms
+from construct import build
+import parse
+import problem
+import tsplib
+
+# Longitud del tour optimo de las instancias incluidas, segun TSPLIB
+# (ar24 no es de TSPLIB: su cota de Held-Karp coincide con un tour conocido)
+OPTIMA = {'ar24': 86585,
+          'att48': 10628,
+          'berlin52': 7542,
+          'burma14': 3323,
+          'pr76': 108159,
+          'ulysses16': 6859}
+
+# Carpeta con las instancias por defecto
+INSTANCES = Path(__file__).parent / 'instances'
+
+# Columnas de cada corrida, en el orden del CSV
+FIELDS = ['instance', 'n', 'algorithm', 'seed', 'length', 'optimum', 'gap',
+          'time', 'iterations', 'evaluations']
+
+
+def run(filenames: list[str], algos: list[str], seeds: int, init: str = 'random',
+        budget: float | None = None) -> list[dict]:
+    """Resuelve cada instancia con cada algoritmo y cada semilla.
+
+    Argumentos:
+    ==========
+    filenames: list[str]
+        rutas de las instancias
+    algos: list[str]
+        nombres de los algoritmos, ver algorithms.ALGORITHMS
+    seeds: int
+        cantidad de semillas, se usan 0, 1, ..., seeds-1
+    init: str
+        constructor del tour inicial, ver construct.BUILDERS
+    budget: float | None
+        limite de tiempo de cada corrida, en segundos (ver algorithms.apply_budget())
+
+    Retorno:
+    =======
+    runs: list[dict]
+        una corrida por elemento, con las claves de FIELDS
+    """
+    runs = []
+    for filename in filenames:
+        instance = tsplib.read(filename)
+        name = Path(filename).stem
+        optimum = OPTIMA.get(name)
+        p = problem.TSP.from_tsplib(instance)
+        for algo_name in algos:
+            for seed in range(seeds):
+                p.init = build(init, p, Random(seed))
+                algo = algorithms.ALGORITHMS[algo_name](seed)
+                algorithms.apply_budget(algo, budget)
+                algo.solve(p)
+                if not algo.tour:
+                    break  # el algoritmo no resuelve esta instancia (ver HeldKarp)
+                length = -algo.value
+                gap = 100 * (length - optimum) / optimum if optimum else None
+                runs.append({'instance': name,
+                             'n': p.n,
+                             'algorithm': algo_name,
+                             'seed': seed,
+                             'length': length,
+                             'optimum': optimum,
+                             'gap': gap,
+                             'time': algo.time,
+                             'iterations': algo.niters,
+                             'evaluations': algo.nevals})
+    return runs
+
+
+def summarize(runs: list[dict]) -> list[dict]:
+    """Resume las corridas por instancia y algoritmo.
+
+    Argumentos:
+    ==========
+    runs: list[dict]
+        corridas, ver run()
+
+    Retorno:
+    =======
+    summary: list[dict]
+        una fila por par (instancia, algoritmo) con la cantidad de corridas,
+        el gap medio, el mejor gap, el tiempo medio y las iteraciones y
+        evaluaciones medias (los gaps son None si no se conoce el optimo)
+    """
+    groups = {}
+    for r in runs:
+        groups.setdefault((r['instance'], r['algorithm']), []).append(r)
+    summary = []
+    for (instance, algorithm), group in groups.items():
+        gaps = [r['gap'] for r in group if r['gap'] is not None]
+        summary.append({'instance': instance,
+                        'algorithm': algorithm,
+                        'runs': len(group),
+                        'mean_gap': float(np.mean(gaps)) if gaps else None,
+                        'best_gap': min(gaps) if gaps else None,
+                        'best_length': min(r['length'] for r in group),
+                        'mean_time': float(np.mean([r['time'] for r in group])),
+                        'mean_iterations': float(np.mean([r['iterations'] for r in group])),
+                        'mean_evaluations': float(np.mean([r['evaluations'] for r in group]))})
+    return summary
+
+
+def compare(summary: list[dict], baseline: list[dict], gap_tol: float = 0.5,
+            time_tol: float = 1.5, min_time: float = 0.05) -> list[str]:
+    """Compara un resumen con el de una corrida anterior.
+
+    Argumentos:
+    ==========
+    summary: list[dict]
+        resumen actual, ver summarize()
+    baseline: list[dict]
+        resumen de referencia
+    gap_tol: float
+        aumento del gap medio, en puntos porcentuales, que es una regresion
+    time_tol: float
+        cociente de tiempos medios que es una regresion
+    min_time: float
+        tiempo medio en segundos por debajo del cual no se comparan tiempos,
+        para no confundir ruido con regresiones
+
+    Retorno:
+    =======
+    regressions: list[str]
+        descripcion de cada regresion encontrada
+    """
+    before = {(s['instance'], s['algorithm']): s for s in baseline}
+    regressions = []
+    for s in summary:
+        b = before.get((s['instance'], s['algorithm']))
+        if b is None:
+            continue
+        key = "{} / {}".format(s['instance'], s['algorithm'])
+        if s['mean_gap'] is not None and b['mean_gap'] is not None:
+            if s['mean_gap'] > b['mean_gap'] + gap_tol:
+                regressions.append("{}: gap {:.2f}% -> {:.2f}%".format(
+                    key, b['mean_gap'], s['mean_gap']))
+        if max(s['mean_time'], b['mean_time']) >= min_time:
+            if s['mean_time'] > time_tol * b['mean_time']:
+                regressions.append("{}: tiempo {:.3f}s -> {:.3f}s".format(
+                    key, b['mean_time'], s['mean_time']))
+    return regressions
+
+
+def write_json(path: str, runs: list[dict], summary: list[dict]) -> None:
+    """Escribe las corridas y el resumen como JSON."""
+    with open(path, 'w') as f:
+        json.dump({'runs': runs, 'summary': summary}, f, indent=1)
+
+
+def write_csv(path: str, runs: list[dict]) -> None:
+    """Escribe las corridas como CSV, una fila por corrida."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(runs)
+
+
+def bench() -> None:
+    """Funcion principal del benchmark."""
+    args = parse.parse_bench()
+
+    filenames = args.instances or sorted(str(f) for f in INSTANCES.glob('*.tsp'))
+    algos = args.algos or algorithms.ALGO_NAMES
+    for name in algos:
+        if name not in algorithms.ALGORITHMS:
+            raise SystemExit("algoritmo desconocido: {}".format(name))
+
+    runs = run(filenames, algos, args.seeds, args.init, args.budget)
+    summary = summarize(runs)
+
+    print("Instancia:", "Algoritmo:", "Gap medio:", "Mejor gap:", "Tiempo:", sep="\t")
+    for s in summary:
+        gaps = ["-" if g is None else "%.2f%%" % g for g in (s['mean_gap'], s['best_gap'])]
+        print(s['instance'], s['algorithm'], *gaps, "%.3f" % s['mean_time'], sep="\t")
+
+    if args.json:
+        write_json(args.json, runs, summary)
+    if args.csv:
+        write_csv(args.csv, runs)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['summary']
+        regressions = compare(summary, baseline, args.gap_tol, args.time_tol)
+        for r in regressions:
+            print("REGRESION", r, sep="\t")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,250 @@
+"""Este modulo se encarga de calcular cotas inferiores para el TSP.
+
+La cota es la de Held y Karp: un 1-tree es un arbol generador de las ciudades
+1..n-1 mas dos aristas de la ciudad 0, y todo tour es un 1-tree en el que
+cada ciudad tiene grado 2. Por eso el 1-tree minimo no es mas largo que el
+tour optimo.
+
+* Si a cada ciudad u se le asigna una penalidad pi[u] y se suma a las
+aristas que la tocan, d'(u,v) = d(u,v) + pi[u] + pi[v], la longitud de
+todo tour aumenta en exactamente 2*sum(pi), por lo que w(pi) = 1-tree
+minimo con d' - 2*sum(pi) tambien es una cota inferior.
+
+* Las penalidades se ajustan por subgradiente (ver subgradient()): las
+ciudades de grado mayor a 2 se penalizan y las de grado 1 se premian, lo que
+acerca el 1-tree a un tour y sube la cota.
+
+* Con la matriz de distancias el arbol se calcula con Prim en O(n^2), fila
+por fila y sin construir la matriz penalizada. Si las distancias se calculan
+a demanda (tsplib.CoordDistances) se usa solo el grafo de candidatos y
+Kruskal; en ese caso el resultado es una estimacion y no una cota
+garantizada, pues el arbol puede necesitar aristas fuera de los candidatos.
+"""
+
+from __future__ import annotations
+from typing import Callable
+import numpy as np
+from construct import build
+from tsplib import CoordDistances
+from unionfind import find
+
+# Tipo de los arboles de subgradient(): pi -> (costo, grados, aristas)
+OneTree = Callable[[np.ndarray], tuple[float, np.ndarray, np.ndarray]]
+
+
+def held_karp(problem, upper: float | None = None, max_iters: int | None = None
+              ) -> tuple[float, np.ndarray]:
+    """Calcula la cota de Held-Karp de un TSP.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un TSP
+    upper: float | None
+        longitud de un tour conocido, que guia el tamaño de los pasos
+        por defecto se construye uno con greedy edge (ver construct.py)
+    max_iters: int | None
+        cantidad maxima de iteraciones del subgradiente, por defecto entre
+        100 y 1000 segun n con la matriz de distancias (cada una es O(n^2))
+        y 100 con los candidatos
+
+    Retorno:
+    =======
+    bound: float
+        cota inferior de la longitud del tour optimo
+    pi: np.ndarray
+        penalidades con las que se alcanzo la cota
+    """
+    n = problem.n
+    if upper is None:
+        upper = -problem.obj_val(build('greedy', problem))
+    dist = problem.dist
+    if isinstance(dist, CoordDistances):
+        cand = problem.neighbors()
+        U = np.repeat(np.arange(n), cand.shape[1])
+        V = cand.ravel()
+        W = np.asarray(dist[U, V], dtype=float)
+
+        def tree(pi):
+            return candidate_one_tree(U, V, W, n, pi)
+        max_iters = 100 if max_iters is None else max_iters
+    else:
+        def tree(pi):
+            return one_tree(lambda u: dist[u].astype(float), n, pi)
+        max_iters = max(100, min(1000, 200000 // n)) if max_iters is None else max_iters
+
+    integer = np.issubdtype(dist.dtype, np.integer)
+    bound, pi, _ = subgradient(tree, n, upper, max_iters=max_iters, integer=integer)
+    return bound, pi
+
+
+def subgradient(tree: OneTree, n: int, upper: float, pi: np.ndarray | None = None,
+                max_iters: int = 1000, patience: int = 20, integer: bool = False,
+                stop: Callable[[], bool] | None = None
+                ) -> tuple[float, np.ndarray, np.ndarray]:
+    """Maximiza w(pi) por subgradiente.
+
+    El paso es el de Polyak: t = lam * (upper - w) / |g|^2, con g el vector
+    de grados menos 2. lam empieza en 2 y se divide por 2 cada patience
+    iteraciones sin mejorar la cota.
+
+    Argumentos:
+    ==========
+    tree: OneTree
+        funcion que calcula el 1-tree minimo con penalidades pi, y retorna
+        su costo con las distancias penalizadas, los grados y las aristas
+    n: int
+        cantidad de ciudades
+    upper: float
+        longitud de un tour conocido
+    pi: np.ndarray | None
+        penalidades iniciales, por defecto ceros
+    max_iters: int
+        cantidad maxima de iteraciones
+    patience: int
+        iteraciones sin mejora antes de achicar el paso
+    integer: bool
+        si las distancias son enteras, la cota se redondea hacia arriba
+    stop: Callable[[], bool] | None
+        funcion que se consulta despues de cada 1-tree, si retorna True se
+        corta con la mejor cota hasta el momento (que sigue siendo valida)
+
+    Retorno:
+    =======
+    bound: float
+        mejor cota encontrada
+    pi: np.ndarray
+        penalidades de la mejor cota
+    edges: np.ndarray
+        aristas del 1-tree de la mejor cota, arreglo de n x 2
+        si todos los grados son 2 es un tour optimo
+    """
+    pi = np.zeros(n) if pi is None else pi.astype(float)
+    best, best_pi, best_edges = -np.inf, pi, None
+    lam = 2.0
+    sin_mejora = 0
+    for _ in range(max_iters):
+        cost, deg, edges = tree(pi)
+        w = cost - 2 * pi.sum()
+        if w > best + 1e-9:
+            best, best_pi, best_edges = w, pi.copy(), edges
+            sin_mejora = 0
+        else:
+            sin_mejora += 1
+            if sin_mejora >= patience:
+                lam /= 2
+                sin_mejora = 0
+        g = deg - 2
+        norm = float(g @ g)
+        if norm == 0:
+            break  # el 1-tree es un tour, y por lo tanto optimo
+        if (integer and np.ceil(best - 1e-6) >= upper) or lam < 1e-4:
+            break  # la cota ya alcanza al tour conocido, o no avanza mas
+        if stop is not None and stop():
+            break
+        pi = pi + lam * max(upper - w, 1e-9 * abs(upper) + 1e-9) / norm * g
+    if integer:
+        best = float(np.ceil(best - 1e-6))
+    return float(best), best_pi, best_edges
+
+
+def one_tree(row: Callable[[int], np.ndarray], n: int,
+             pi: np.ndarray) -> tuple[float, np.ndarray, np.ndarray]:
+    """Calcula el 1-tree minimo con Prim, en O(n^2).
+
+    Argumentos:
+    ==========
+    row: Callable[[int], np.ndarray]
+        row(u) retorna las distancias de u a todas las ciudades, como float
+        puede tener inf en las aristas prohibidas
+    n: int
+        cantidad de ciudades
+    pi: np.ndarray
+        penalidad de cada ciudad
+
+    Retorno:
+    =======
+    cost: float
+        costo del 1-tree con las distancias penalizadas
+    deg: np.ndarray
+        grado de cada ciudad
+    edges: np.ndarray
+        aristas del 1-tree, arreglo de n x 2
+    """
+    # Arbol generador de las ciudades 1..n-1
+    libre = np.ones(n, dtype=bool)
+    libre[0] = libre[1] = False
+    key = row(1) + pi[1] + pi
+    key[~libre] = np.inf
+    parent = np.ones(n, dtype=np.int64)
+    edges = np.empty((n, 2), dtype=np.int64)
+    cost = 0.0
+    for e in range(n - 2):
+        v = int(np.argmin(key))
+        cost += key[v]
+        edges[e] = (parent[v], v)
+        libre[v] = False
+        key[v] = np.inf
+        w = row(v) + pi[v] + pi
+        mejor = libre & (w < key)
+        key[mejor] = w[mejor]
+        parent[mejor] = v
+
+    # Las dos aristas mas cortas de la ciudad 0
+    w = row(0) + pi[0] + pi
+    w[0] = np.inf
+    a, b = np.argpartition(w, 1)[:2]
+    cost += w[a] + w[b]
+    edges[n - 2] = (0, a)
+    edges[n - 1] = (0, b)
+    deg = np.bincount(edges.ravel(), minlength=n)
+    return float(cost), deg, edges
+
+
+def candidate_one_tree(U: np.ndarray, V: np.ndarray, W: np.ndarray, n: int,
+                       pi: np.ndarray) -> tuple[float, np.ndarray, np.ndarray]:
+    """Calcula el 1-tree minimo del grafo de candidatos con Kruskal.
+
+    Si el grafo de candidatos sin la ciudad 0 no es conexo el resultado es
+    un bosque, con menos de n aristas.
+
+    Argumentos:
+    ==========
+    U, V, W: np.ndarray
+        aristas (U[k], V[k]) del grafo de candidatos y sus distancias W[k]
+    n: int
+        cantidad de ciudades
+    pi: np.ndarray
+        penalidad de cada ciudad
+
+    Retorno:
+    =======
+    cost: float
+        costo del 1-tree con las distancias penalizadas
+    deg: np.ndarray
+        grado de cada ciudad
+    edges: np.ndarray
+        aristas del 1-tree, arreglo de m x 2 con m <= n
+    """
+    w = W + pi[U] + pi[V]
+    order = np.argsort(w, kind='stable')
+    parent = list(range(n))
+    edges = []
+    cost = 0.0
+    ceros = []  # aristas de la ciudad 0, de menor a mayor
+    for k, u, v in zip(order.tolist(), U[order].tolist(), V[order].tolist()):
+        if u == 0 or v == 0:
+            if len(ceros) < 2 and (u, v)[::-1] not in ceros:
+                ceros.append((u, v))
+                cost += w[k]
+            continue
+        ru, rv = find(parent, u), find(parent, v)
+        if ru != rv:
+            parent[ru] = rv
+            edges.append((u, v))
+            cost += w[k]
+            if len(edges) == n - 2 and len(ceros) == 2:
+                break
+    edges = np.array(edges + ceros, dtype=np.int64).reshape(-1, 2)
+    deg = np.bincount(edges.ravel(), minlength=n)
+    return float(cost), deg, edges
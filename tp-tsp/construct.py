@@ -0,0 +1,337 @@
+"""Este modulo se encarga de construir tours iniciales para el TSP.
+
+Los algoritmos de busqueda local mejoran mucho mas rapido si arrancan de un
+tour razonable en lugar de uno arbitrario. Los constructores disponibles son:
+
+* 'identity': el tour [0, 1, ..., n-1, 0], el estado inicial original.
+
+* 'random': un tour aleatorio, ver TSP.random_reset().
+
+* 'nn': vecino mas cercano. Desde cada ciudad se va a la ciudad no visitada
+mas cercana, buscandola primero en la lista de candidatos y, si todos ya se
+visitaron, en una grilla de celdas con las ciudades sin visitar.
+
+* 'greedy': greedy edge matching. Se recorren las aristas de las listas de
+candidatos de menor a mayor y se agrega cada una que no cierre un ciclo ni
+deje una ciudad con grado 3. Los caminos resultantes se unen con vecino mas
+cercano entre sus extremos.
+
+* 'hilbert': las ciudades se recorren en el orden de la curva de Hilbert
+que pasa por sus coordenadas. Es el mas rapido, pero el de peor calidad.
+
+Todos reciben un TSP y opcionalmente un generador aleatorio. Con generador
+se construye una variante aleatoria (otra ciudad de partida, pequeñas
+perturbaciones de las distancias o una rotacion de las coordenadas), lo que
+permite usarlos en los reinicios de HillClimbingReset.
+"""
+
+from __future__ import annotations
+from math import cos, sin, pi
+from random import Random
+from typing import Callable
+import numpy as np
+from unionfind import find
+
+
+def build(init: str | Callable, problem, rng: Random | None = None) -> list[int]:
+    """Construye un estado inicial del TSP.
+
+    Argumentos:
+    ==========
+    init: str | Callable
+        nombre de un constructor de BUILDERS, o una funcion con la misma firma
+    problem: TSP
+        un TSP
+    rng: Random | None
+        si se indica, se construye una variante aleatoria
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado, empieza y termina en la ciudad 0
+    """
+    if callable(init):
+        return init(problem, rng)
+    if init not in BUILDERS:
+        raise ValueError("constructor de tours desconocido: {}".format(init))
+    return BUILDERS[init](problem, rng)
+
+
+def identity(problem, rng: Random | None = None) -> list[int]:
+    """Tour [0, 1, ..., n-1, 0]. Ignora rng."""
+    state = list(range(problem.n))
+    state.append(0)
+    return state
+
+
+def random_tour(problem, rng: Random | None = None) -> list[int]:
+    """Tour aleatorio, ver TSP.random_reset()."""
+    return problem.random_reset(rng)
+
+
+def nearest_neighbor(problem, rng: Random | None = None) -> list[int]:
+    """Construye un tour con la heuristica del vecino mas cercano.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un TSP
+    rng: Random | None
+        si se indica, la ciudad de partida se elige al azar
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado, empieza y termina en la ciudad 0
+    """
+    n = problem.n
+    cand = problem.neighbors()
+    visitada = bytearray(n)
+    grid = _Grid(problem.coords) if problem.coords is not None else None
+
+    u = rng.randrange(n) if rng is not None else 0
+    order = [u]
+    visitada[u] = 1
+    if grid is not None:
+        grid.remove(u)
+    for _ in range(n - 1):
+        v = -1
+        for w in cand[u].tolist():
+            if not visitada[w]:
+                v = w
+                break
+        if v < 0:
+            if grid is not None:
+                v = grid.nearest(u)
+            else:
+                row = np.asarray(problem.dist[u, np.arange(n)], dtype=float)
+                row[np.frombuffer(visitada, dtype=np.uint8).astype(bool)] = np.inf
+                v = int(np.argmin(row))
+        order.append(v)
+        visitada[v] = 1
+        if grid is not None:
+            grid.remove(v)
+        u = v
+    return _state(order)
+
+
+def greedy_edge(problem, rng: Random | None = None) -> list[int]:
+    """Construye un tour con la heuristica greedy edge.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un TSP
+    rng: Random | None
+        si se indica, las distancias se perturban hasta un 10% al ordenar
+        las aristas
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado, empieza y termina en la ciudad 0
+    """
+    n = problem.n
+    cand = problem.neighbors()
+
+    # Aristas de las listas de candidatos, sin repetir, de menor a mayor
+    U = np.repeat(np.arange(n), cand.shape[1])
+    V = cand.ravel()
+    code = np.unique(np.minimum(U, V) * n + np.maximum(U, V))
+    U, V = code // n, code % n
+    weight = np.asarray(problem.dist[U, V], dtype=float)
+    if rng is not None:
+        noise = np.random.default_rng(rng.getrandbits(32)).random(len(weight))
+        weight *= 1.0 + 0.1 * noise
+    order = np.argsort(weight, kind='stable')
+
+    # Agregar aristas sin ciudades de grado 3 ni ciclos (union-find)
+    parent = list(range(n))
+    adj = [[] for _ in range(n)]
+    for u, v in zip(U[order].tolist(), V[order].tolist()):
+        if len(adj[u]) < 2 and len(adj[v]) < 2:
+            ru, rv = find(parent, u), find(parent, v)
+            if ru != rv:
+                parent[ru] = rv
+                adj[u].append(v)
+                adj[v].append(u)
+
+    # Separar los caminos, recorriendolos desde un extremo
+    paths = []
+    usada = bytearray(n)
+    for s in range(n):
+        if usada[s] or len(adj[s]) == 2:
+            continue
+        path = [s]
+        usada[s] = 1
+        prev, c = -1, s
+        while True:
+            nxt = [w for w in adj[c] if w != prev]
+            if not nxt:
+                break
+            prev, c = c, nxt[0]
+            path.append(c)
+            usada[c] = 1
+        paths.append(path)
+    return _state(_join(problem, paths))
+
+
+def space_filling_curve(problem, rng: Random | None = None) -> list[int]:
+    """Construye un tour recorriendo las ciudades en el orden de la curva de Hilbert.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un TSP, con coordenadas
+    rng: Random | None
+        si se indica, las coordenadas se rotan un angulo al azar
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado, empieza y termina en la ciudad 0
+    """
+    if problem.coords is None:
+        raise ValueError("la curva de Hilbert requiere las coordenadas de las ciudades")
+    coords = np.asarray(problem.coords, dtype=float)
+    if rng is not None:
+        a = rng.uniform(0, 2 * pi)
+        coords = coords @ np.array([[cos(a), -sin(a)], [sin(a), cos(a)]])
+
+    # Coordenadas enteras en una grilla de 2^order x 2^order
+    order = 16
+    side = 1 << order
+    lo = coords.min(axis=0)
+    span = (coords.max(axis=0) - lo).max()
+    scale = (side - 1) / span if span > 0 else 0.0
+    x = ((coords[:, 0] - lo[0]) * scale).astype(np.int64)
+    y = ((coords[:, 1] - lo[1]) * scale).astype(np.int64)
+
+    # Indice de cada punto en la curva (algoritmo xy2d)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        flip = ~ry & rx
+        x[flip] = side - 1 - x[flip]
+        y[flip] = side - 1 - y[flip]
+        swap = ~ry
+        x[swap], y[swap] = y[swap], x[swap].copy()
+        s >>= 1
+    return _state(np.argsort(d, kind='stable').tolist())
+
+
+# Constructores disponibles, por nombre
+BUILDERS = {'identity': identity,
+            'random': random_tour,
+            'nn': nearest_neighbor,
+            'greedy': greedy_edge,
+            'hilbert': space_filling_curve}
+
+
+def _state(order: list[int]) -> list[int]:
+    """Convierte un orden de las ciudades en un estado que empieza y termina en 0."""
+    i = order.index(0)
+    state = order[i:] + order[:i]
+    state.append(0)
+    return state
+
+
+def _join(problem, paths: list[list[int]]) -> list[int]:
+    """Une caminos en un tour, yendo siempre al extremo libre mas cercano."""
+    if len(paths) == 1:
+        return paths[0]
+    first = [p[0] for p in paths]
+    last = [p[-1] for p in paths]
+    path_of = {}
+    for i, p in enumerate(paths):
+        path_of[p[0]] = i
+        path_of[p[-1]] = i
+
+    ends = np.array(sorted(path_of))
+    grid = _Grid(problem.coords, ends) if problem.coords is not None else None
+    libre = np.ones(len(ends), dtype=bool)  # solo para la busqueda sin grilla
+
+    def remove(i: int) -> None:
+        for c in {first[i], last[i]}:
+            if grid is not None:
+                grid.remove(c)
+            else:
+                libre[np.searchsorted(ends, c)] = False
+
+    order = list(paths[0])
+    remove(0)
+    for _ in range(len(paths) - 1):
+        u = order[-1]
+        if grid is not None:
+            c = grid.nearest(u)
+        else:
+            row = np.asarray(problem.dist[u, ends], dtype=float)
+            row[~libre] = np.inf
+            c = int(ends[np.argmin(row)])
+        i = path_of[c]
+        order.extend(paths[i] if c == first[i] else paths[i][::-1])
+        remove(i)
+    return order
+
+
+class _Grid:
+    """Grilla de celdas con un conjunto de ciudades, para buscar la mas cercana."""
+
+    def __init__(self, coords: np.ndarray, cities: np.ndarray | None = None) -> None:
+        coords = np.asarray(coords, dtype=float)
+        if cities is None:
+            cities = np.arange(len(coords))
+        self.xy = coords.tolist()
+        m = len(cities)
+        self.g = g = max(1, int(np.sqrt(m / 2)))
+        pts = coords[cities]
+        self.lo = pts.min(axis=0)
+        self.side = (pts.max(axis=0) - self.lo).max() / g or 1.0
+        cell = np.minimum(((pts - self.lo) / self.side).astype(np.int64), g - 1)
+        self.cells = [[] for _ in range(g * g)]
+        self.cell_of = {}
+        self.slot = {}
+        for c, cx, cy in zip(cities.tolist(), cell[:, 0].tolist(), cell[:, 1].tolist()):
+            key = cx * g + cy
+            self.cell_of[c] = key
+            self.slot[c] = len(self.cells[key])
+            self.cells[key].append(c)
+        self.size = m
+
+    def remove(self, c: int) -> None:
+        """Quita una ciudad de la grilla, en O(1)."""
+        cell = self.cells[self.cell_of[c]]
+        i = self.slot.pop(c)
+        last = cell.pop()
+        if last != c:
+            cell[i] = last
+            self.slot[last] = i
+        self.size -= 1
+
+    def nearest(self, u: int) -> int:
+        """Ciudad de la grilla mas cercana a la ciudad u, que puede no estar en ella."""
+        xy, g = self.xy, self.g
+        px, py = xy[u]
+        cx = min(max(int((px - self.lo[0]) / self.side), 0), g - 1)
+        cy = min(max(int((py - self.lo[1]) / self.side), 0), g - 1)
+        best, best_d = -1, float('inf')
+        r = 0
+        while r <= g:
+            # Celdas del anillo de radio r alrededor de (cx, cy)
+            for x in range(max(cx - r, 0), min(cx + r, g - 1) + 1):
+                ys = (cy - r, cy + r) if abs(x - cx) < r else range(cy - r, cy + r + 1)
+                for y in ys:
+                    if 0 <= y < g:
+                        for c in self.cells[x * g + y]:
+                            dx, dy = xy[c][0] - px, xy[c][1] - py
+                            d = dx * dx + dy * dy
+                            if d < best_d:
+                                best, best_d = c, d
+            # Las celdas de anillos mayores estan a distancia > r*side
+            if best >= 0 and best_d <= (r * self.side) ** 2:
+                break
+            r += 1
+        return best
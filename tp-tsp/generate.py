@@ -0,0 +1,128 @@
+"""Este modulo se encarga de generar instancias sinteticas del TSP.
+
+Las instancias incluidas tienen a lo sumo 76 ciudades. Para estudiar como
+escalan los algoritmos se generan instancias euclideas (EUC_2D) de cualquier
+tamaño, con coordenadas enteras en [0, SIDE) x [0, SIDE). Los generadores
+disponibles son:
+
+* 'uniform': ciudades uniformes en el cuadrado.
+
+* 'clustered': ciudades agrupadas alrededor de n/100 centros uniformes, con
+distribucion normal alrededor de cada centro.
+
+* 'grid': ciudades en los puntos de una grilla, con un pequeño desplazamiento
+aleatorio. Hay muchas distancias casi iguales, lo que es dificil para las
+busquedas locales.
+
+La misma semilla genera siempre la misma instancia. Las instancias se
+escriben en formato TSPLIB (.tsp) o como arreglo de NumPy de n x 2 (.npy),
+que tsplib.read() tambien lee.
+
+Uso: python generate.py uniform 100000 --seed 1 -o instances/u100k.tsp
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+import parse
+
+# Lado del cuadrado de las coordenadas
+SIDE = 1_000_000
+
+
+def generate(kind: str, n: int, seed: int = 0) -> np.ndarray:
+    """Genera las coordenadas de una instancia.
+
+    Argumentos:
+    ==========
+    kind: str
+        nombre de un generador de GENERATORS
+    n: int
+        cantidad de ciudades
+    seed: int
+        semilla del generador de NumPy
+
+    Retorno:
+    =======
+    coords: np.ndarray
+        arreglo de n x 2 con coordenadas enteras, indexado desde 0
+    """
+    if kind not in GENERATORS:
+        raise ValueError("generador de instancias desconocido: {}".format(kind))
+    if n < 3:
+        raise ValueError("una instancia necesita al menos 3 ciudades")
+    rng = np.random.default_rng(seed)
+    return GENERATORS[kind](n, rng)
+
+
+def uniform(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Ciudades uniformes en el cuadrado."""
+    return rng.integers(SIDE, size=(n, 2)).astype(float)
+
+
+def clustered(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Ciudades con distribucion normal alrededor de max(1, n/100) centros uniformes."""
+    c = max(1, n // 100)
+    centers = rng.integers(SIDE, size=(c, 2))
+    sigma = SIDE / (4 * np.sqrt(c))
+    coords = centers[rng.integers(c, size=n)] + rng.normal(0, sigma, size=(n, 2))
+    return np.clip(np.rint(coords), 0, SIDE - 1)
+
+
+def grid(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Ciudades en n puntos elegidos de una grilla, desplazadas hasta un 10% de su separacion."""
+    g = int(np.ceil(np.sqrt(n)))
+    step = SIDE / g
+    cells = rng.choice(g * g, size=n, replace=False)
+    coords = np.column_stack([cells // g, cells % g]) * step + step / 2
+    coords += rng.uniform(-0.1 * step, 0.1 * step, size=(n, 2))
+    return np.clip(np.rint(coords), 0, SIDE - 1)
+
+
+# Generadores disponibles, por nombre
+GENERATORS = {'uniform': uniform,
+              'clustered': clustered,
+              'grid': grid}
+
+
+def write(filename: str, coords: np.ndarray, comment: str = '') -> None:
+    """Escribe una instancia EUC_2D, en formato TSPLIB o .npy segun la extension.
+
+    Argumentos:
+    ==========
+    filename: str
+        ruta del archivo, terminada en ".tsp" o ".npy"
+    coords: np.ndarray
+        arreglo de n x 2 con las coordenadas
+    comment: str
+        comentario del archivo TSPLIB
+    """
+    path = Path(filename)
+    if path.suffix == '.npy':
+        np.save(path, coords)
+        return
+    n = len(coords)
+    with open(path, 'w') as f:
+        f.write("NAME : {}\n".format(path.stem))
+        if comment:
+            f.write("COMMENT : {}\n".format(comment))
+        f.write("TYPE : TSP\n")
+        f.write("DIMENSION : {}\n".format(n))
+        f.write("EDGE_WEIGHT_TYPE : EUC_2D\n")
+        f.write("NODE_COORD_SECTION\n")
+        rows = np.column_stack([np.arange(1, n + 1), coords]).astype(np.int64)
+        np.savetxt(f, rows, fmt='%d')
+        f.write("EOF\n")
+
+
+def main() -> None:
+    """Funcion principal del generador."""
+    args = parse.parse_generate()
+    coords = generate(args.kind, args.n, args.seed)
+    filename = args.output or "{}{}_{}.tsp".format(args.kind, args.n, args.seed)
+    comment = "{} instance, {} cities, seed {}".format(args.kind, args.n, args.seed)
+    write(filename, coords, comment)
+
+
+if __name__ == "__main__":
+    main()
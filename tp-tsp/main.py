@@ -5,17 +5,12 @@ Fecha: 2023.
 Materia: Prog3 - TUIA
 """
 
+from algorithms import ALGORITHMS, ALGO_NAMES, apply_budget
 import parse
-import load
-import search
 import plot
+import portfolio
 import problem
-
-# Algoritmos involucrados
-HILL_CLIMBING = "hill"
-HILL_CLIMBING_RANDOM_RESET = "hill_reset"
-TABU_SEARCH = "tabu"
-ALGO_NAMES = [HILL_CLIMBING, HILL_CLIMBING_RANDOM_RESET, TABU_SEARCH]
+import tsplib
 
 
 def main() -> None:
@@ -23,32 +18,73 @@ def main() -> None:
     # Parsear los argumentos de la linea de comandos
     args = parse.parse()
 
-    # Leer la instancia
-    G, coords = load.read_tsp(args.filename)
+    # Leer la instancia directamente a arreglos de NumPy, sin construir un grafo
+    instance = tsplib.read(args.filename)
 
     # Construir la instancia de TSP
-    p = problem.TSP(G)
+    p = problem.TSP.from_tsplib(instance, cache=not args.no_cache, init=args.init)
 
     # Construir las instancias de los algoritmos
-    algos = {HILL_CLIMBING: search.HillClimbing(),
-             HILL_CLIMBING_RANDOM_RESET: search.HillClimbingReset(),
-             TABU_SEARCH: search.Tabu()}
-
-    # Resolver el TSP con cada algoritmo
-    for algo in algos.values():
-        algo.solve(p)
+    algos = {name: build(None) for name, build in ALGORITHMS.items()}
 
-    # Mostrar resultados por linea de comandos
+    # Resolver el TSP con cada algoritmo y mostrar resultados por linea de comandos
+    budgets = parse_budgets(args.budget)
+    if args.target_gap is not None:
+        for algo in algos.values():
+            algo.target_gap = args.target_gap
+        print("Cota inferior:", p.lower_bound())
     print("Valor:", "Tiempo:", "Iters:", "Algoritmo:", sep="\t\t")
-    for name, algo in algos.items():
-        print(algo.value, "%.2f" % algo.time, algo.niters, name, sep="\t\t")
+    if args.parallel:
+        # Todos a la vez, mostrando cada resultado cuando termina
+        for name, terminado in portfolio.solve_portfolio(p, algos, budgets):
+            algo = algos[name]
+            if terminado and algo.tour:
+                print(algo.value, "%.2f" % algo.time, algo.niters, name, sep="\t\t")
+            else:
+                print("-", "-", "-", name + " (sin resultado)", sep="\t\t")
+    else:
+        for name, algo in algos.items():
+            apply_budget(algo, budgets.get(name))
+            algo.solve(p)
+            if algo.tour:
+                print(algo.value, "%.2f" % algo.time, algo.niters, name, sep="\t\t")
+            else:
+                print("-", "-", "-", name + " (sin resultado)", sep="\t\t")
 
     # Graficar los tours
     tours = {}
     tours['init'] = (p.init, p.obj_val(p.init))  # estado inicial
     for name, algo in algos.items():
-        tours[name] = (algo.tour, algo.value)
-    plot.show(G, coords, args.filename, tours)
+        if algo.tour:
+            tours[name] = (algo.tour, algo.value)
+    if instance.coords is not None:
+        coords = {i + 1: tuple(c) for i, c in enumerate(instance.coords)}
+        plot.show(None, coords, args.filename, tours)
+
+
+def parse_budgets(budgets: list[str] | None) -> dict[str, float]:
+    """Interpreta los presupuestos de tiempo de la linea de comandos.
+
+    Argumentos:
+    ==========
+    budgets: list[str] | None
+        presupuestos de la forma "SEGUNDOS" (para todos los algoritmos)
+        o "ALGORITMO=SEGUNDOS"
+
+    Retorno:
+    =======
+    budget: dict[str, float]
+        presupuesto en segundos de cada algoritmo que tiene uno
+    """
+    budget = {}
+    for item in budgets or []:
+        name, _, seconds = item.rpartition('=')
+        names = [name] if name else ALGO_NAMES
+        if name and name not in ALGO_NAMES:
+            raise SystemExit("algoritmo desconocido: {}".format(name))
+        for n in names:
+            budget[n] = float(seconds)
+    return budget
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+"""Este modulo se encarga de calcular listas de candidatos.
+
+La lista de candidatos de una ciudad son sus k ciudades mas cercanas. Se usan
+para restringir las acciones 2-opt a aquellas que unen una ciudad con uno de
+sus candidatos, lo que reduce el vecindario de O(n^2) a O(n*k) acciones.
+
+Las ciudades se distribuyen en una grilla de celdas cuadradas (grid
+bucketing), y los vecinos de cada ciudad se buscan solo en las celdas
+cercanas, agrandando el radio de busqueda hasta garantizar que no haya
+ciudades mas cercanas afuera. Asi no se calculan las n^2 distancias.
+"""
+
+from __future__ import annotations
+import numpy as np
+
+
+def nearest(coords: np.ndarray, k: int) -> np.ndarray:
+    """Calcula las k ciudades mas cercanas a cada ciudad segun sus coordenadas.
+
+    Se usa la distancia euclidea entre coordenadas. Para instancias con otra
+    metrica (por ejemplo GEO) el resultado es una aproximacion, que igual
+    sirve como lista de candidatos.
+
+    Argumentos:
+    ==========
+    coords: np.ndarray
+        arreglo de n x 2 con las coordenadas de cada ciudad (indexado desde 0)
+    k: int
+        cantidad de vecinos por ciudad, se acota a n-1
+
+    Retorno:
+    =======
+    cand: np.ndarray
+        arreglo de n x k, cand[u] son los vecinos de u del mas cercano al
+        mas lejano
+    """
+    coords = np.asarray(coords, dtype=float)
+    n = len(coords)
+    k = min(k, n - 1)
+    cand = np.empty((n, k), dtype=np.int64)
+    if k <= 0:
+        return cand
+
+    # Grilla de g x g celdas con ~2 ciudades por celda
+    g = max(1, int(np.sqrt(n / 2)))
+    lo = coords.min(axis=0)
+    side = (coords.max(axis=0) - lo).max() / g
+    if side == 0:
+        side = 1.0
+    cell = np.minimum(((coords - lo) / side).astype(np.int64), g - 1)
+    key = cell[:, 0] * g + cell[:, 1]
+
+    # Ciudades ordenadas por celda, la celda c ocupa order[start[c]:start[c+1]]
+    order = np.argsort(key, kind='stable')
+    start = np.searchsorted(key[order], np.arange(g * g + 1))
+
+    for c in np.unique(key):
+        cx, cy = divmod(int(c), g)
+        members = order[start[c]:start[c + 1]]
+        r = 1
+        while True:
+            # Ciudades en el cuadrado de celdas de radio r alrededor de c
+            xs = range(max(cx - r, 0), min(cx + r, g - 1) + 1)
+            y0, y1 = max(cy - r, 0), min(cy + r, g - 1)
+            pool = np.concatenate(
+                [order[start[x * g + y0]:start[x * g + y1 + 1]] for x in xs])
+            full = len(xs) == g and y1 - y0 + 1 == g
+            if len(pool) > k:
+                diff = coords[members, None, :] - coords[None, pool, :]
+                dist = np.sqrt((diff ** 2).sum(axis=2))
+                dist[members[:, None] == pool[None, :]] = np.inf
+                near = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                kth = np.take_along_axis(dist, near, axis=1).max(axis=1)
+                # Todo punto a distancia <= r*side de la celda esta en el pool
+                if full or kth.max() <= r * side:
+                    rows = np.arange(len(members))[:, None]
+                    near = near[rows, np.argsort(dist[rows, near], axis=1)]
+                    cand[members] = pool[near]
+                    break
+            r += 1
+    return cand
+
+
+def nearest_from_matrix(dist: np.ndarray, k: int) -> np.ndarray:
+    """Calcula las k ciudades mas cercanas a cada ciudad segun una matriz de distancias.
+
+    Argumentos:
+    ==========
+    dist: np.ndarray
+        matriz de distancias de n x n
+    k: int
+        cantidad de vecinos por ciudad, se acota a n-1
+
+    Retorno:
+    =======
+    cand: np.ndarray
+        arreglo de n x k, cand[u] son los vecinos de u del mas cercano al
+        mas lejano
+    """
+    n = len(dist)
+    k = min(k, n - 1)
+    d = np.array(dist, dtype=float)
+    np.fill_diagonal(d, np.inf)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int64)
+    near = np.argpartition(d, k - 1, axis=1)[:, :k]
+    rows = np.arange(n)[:, None]
+    return near[rows, np.argsort(d[rows, near], axis=1, kind='stable')]
@@ -20,4 +20,110 @@ def parse() -> ArgumentParser:
                         metavar='filename.tsp',
                         help='path to input file')
 
+    # Agregamos los argumentos opcionales
+    parser.add_argument('--init',
+                        choices=['identity', 'random', 'nn', 'greedy', 'hilbert'],
+                        default='identity',
+                        help='initial tour builder (default: identity)')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='do not read or write the distance matrix cache \
+                              (__tspcache__ next to the input file)')
+    parser.add_argument('--parallel',
+                        action='store_true',
+                        help='run all the algorithms at the same time, one \
+                              process each')
+    parser.add_argument('--budget',
+                        action='append',
+                        metavar='[ALGO=]SECONDS',
+                        help='time budget for an algorithm (or for all of \
+                              them), can be repeated')
+    parser.add_argument('--target-gap',
+                        type=float,
+                        metavar='PERCENT',
+                        help='stop each algorithm as soon as its tour is \
+                              within PERCENT of the Held-Karp lower bound')
+
+    return parser.parse_args()
+
+
+def parse_bench() -> ArgumentParser:
+    """Parsea la linea de comandos del benchmark (ver bench.py)."""
+    parser = ArgumentParser(
+        prog='python bench.py',
+        description='This program runs every algorithm over a set of TSPLIB \
+                     instances and several seeds, and reports the gap to the \
+                     known optimum.',
+    )
+
+    parser.add_argument('instances',
+                        nargs='*',
+                        metavar='filename.tsp',
+                        help='instances to solve (default: every .tsp file in \
+                              instances/)')
+    parser.add_argument('--algos',
+                        nargs='+',
+                        metavar='ALGO',
+                        help='algorithms to run (default: all of them)')
+    parser.add_argument('--seeds',
+                        type=int,
+                        default=5,
+                        help='number of seeds per instance and algorithm \
+                              (default: 5)')
+    parser.add_argument('--init',
+                        choices=['identity', 'random', 'nn', 'greedy', 'hilbert'],
+                        default='random',
+                        help='initial tour builder, randomized with each seed \
+                              (default: random)')
+    parser.add_argument('--budget',
+                        type=float,
+                        metavar='SECONDS',
+                        help='time limit of each run')
+    parser.add_argument('--json',
+                        metavar='PATH',
+                        help='write the runs and the summary as JSON')
+    parser.add_argument('--csv',
+                        metavar='PATH',
+                        help='write one row per run as CSV')
+    parser.add_argument('--baseline',
+                        metavar='PATH',
+                        help='JSON file of a previous run to compare against; \
+                              exits with status 1 if there are regressions')
+    parser.add_argument('--gap-tol',
+                        type=float,
+                        default=0.5,
+                        help='mean gap increase, in percentage points, that \
+                              counts as a regression (default: 0.5)')
+    parser.add_argument('--time-tol',
+                        type=float,
+                        default=1.5,
+                        help='mean time ratio that counts as a regression \
+                              (default: 1.5)')
+
+    return parser.parse_args()
+
+
+def parse_generate() -> ArgumentParser:
+    """Parsea la linea de comandos del generador de instancias (ver generate.py)."""
+    parser = ArgumentParser(
+        prog='python generate.py',
+        description='This program generates synthetic Euclidean TSP \
+                     instances.',
+    )
+
+    parser.add_argument('kind',
+                        choices=['uniform', 'clustered', 'grid'],
+                        help='distribution of the cities')
+    parser.add_argument('n',
+                        type=int,
+                        help='number of cities')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('-o', '--output',
+                        metavar='PATH',
+                        help='output file, .tsp (TSPLIB) or .npy (NumPy \
+                              coordinates) (default: KIND+N_SEED.tsp)')
+
     return parser.parse_args()
@@ -8,7 +8,7 @@ import matplotlib.pyplot as plt
 import networkx as nx
 
 
-def show(G: nx.Graph,
+def show(G: nx.Graph | None,
          coords: dict[int, tuple[float, float]],
          name: str,
          sols: dict[str, tuple[list[int]], float]) -> None:
@@ -16,8 +16,9 @@ def show(G: nx.Graph,
 
     Argumentos:
     ==========
-    G: nx.Graph
+    G: nx.Graph | None
         grafo que representa la instancia del TSP
+        si es None se construye uno con las ciudades de coords, sin aristas
     coords: dict[int, tuple[float, float]]
         diccionario con las coordenadas de cada ciudad
     name: str
@@ -25,6 +26,10 @@ def show(G: nx.Graph,
     sols: dict[str, tuple[list[int]], float]
         diccionario con el tour y su costo para cada algoritmo de busqueda
     """
+    if G is None:
+        G = nx.Graph()
+        G.add_nodes_from(coords)
+
     # Crear los subplots
     fig, axs = plt.subplots(nrows=1, ncols=len(sols))
 
@@ -0,0 +1,132 @@
+"""Este modulo define la funcion solve_portfolio.
+
+solve_portfolio resuelve una misma instancia de TSP con varios algoritmos a
+la vez, cada uno en su propio proceso.
+
+* La instancia se publica una unica vez en memoria compartida (ver
+shared.SharedTSP) y cada proceso la lee sin copiarla.
+
+* Cada algoritmo puede tener un presupuesto de tiempo en segundos, que se
+le pasa como time_limit para que se detenga por si mismo con el mejor tour
+encontrado (ver search.LocalSearch). Si aun asi no termina dentro de su
+presupuesto mas un margen de GRACE segundos, su proceso se termina y el
+algoritmo queda sin resultado.
+
+* Los procesos no son daemon, asi los algoritmos pueden usar sus propios
+pools de procesos (HillClimbingReset y BranchAndBound con workers > 1).
+Cada uno corre en su propio grupo de procesos, y al terminarlo se termina
+el grupo completo, sin dejar procesos huerfanos.
+
+* Los resultados se entregan a medida que los algoritmos terminan, de modo
+que el tiempo total es el del algoritmo mas lento y no la suma.
+"""
+
+from __future__ import annotations
+from multiprocessing import Pipe, Process
+import os
+import signal
+from multiprocessing.connection import Connection, wait
+from time import time
+from typing import Iterator
+from algorithms import apply_budget
+from problem import TSP
+from search import LocalSearch
+from shared import SharedTSP, attach
+
+# Margen en segundos entre el presupuesto de un algoritmo y su terminacion
+GRACE = 1.0
+
+
+def solve_portfolio(problem: TSP, algos: dict[str, LocalSearch],
+                    budgets: dict[str, float] | None = None) -> Iterator[tuple[str, bool]]:
+    """Resuelve un TSP con varios algoritmos en paralelo.
+
+    Al terminar cada algoritmo se actualizan en el lugar sus atributos tour,
+    value, niters, nevals, time, trace, bound y gap, como si se hubiera
+    llamado a algo.solve(problem).
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un TSP
+    algos: dict[str, LocalSearch]
+        algoritmos a ejecutar, por nombre
+    budgets: dict[str, float] | None
+        presupuesto de tiempo en segundos de cada algoritmo
+        los algoritmos que no aparecen no tienen limite
+
+    Retorno:
+    =======
+    results: Iterator[tuple[str, bool]]
+        pares (nombre, terminado) en el orden en que terminan los algoritmos
+        terminado es False si el proceso se termino o fallo
+    """
+    budgets = budgets or {}
+    if problem.k is not None:
+        problem.neighbors()  # calcular los candidatos una sola vez
+
+    with SharedTSP(problem) as shared:
+        start = time()
+        running = {}  # conexion -> (nombre, proceso, fin del presupuesto)
+        try:
+            for name, algo in algos.items():
+                recv, send = Pipe(duplex=False)
+                budget = budgets.get(name)
+                proc = Process(target=_run, args=(algo, shared.spec, send, budget))
+                proc.start()
+                send.close()
+                deadline = start + budget + GRACE if budget is not None else None
+                running[recv] = (name, proc, deadline)
+
+            while running:
+                deadlines = [d for _, _, d in running.values() if d is not None]
+                timeout = max(0, min(deadlines) - time()) if deadlines else None
+
+                # Recolectar los algoritmos que terminaron
+                for conn in wait(list(running), timeout):
+                    name, proc, _ = running.pop(conn)
+                    try:
+                        result = conn.recv()
+                    except EOFError:
+                        result = None  # el proceso fallo
+                    conn.close()
+                    proc.join()
+                    if result is not None:
+                        algo = algos[name]
+                        (algo.tour, algo.value, algo.niters, algo.nevals,
+                         algo.time, algo.trace, algo.bound, algo.gap) = result
+                    yield name, result is not None
+
+                # Terminar los algoritmos que agotaron su presupuesto
+                now = time()
+                for conn, (name, proc, deadline) in list(running.items()):
+                    if deadline is not None and now >= deadline:
+                        del running[conn]
+                        _stop(conn, proc)
+                        yield name, False
+        finally:
+            for conn, (_, proc, _) in running.items():
+                _stop(conn, proc)
+
+
+def _run(algo: LocalSearch, spec: dict, conn: Connection, budget: float | None) -> None:
+    """Resuelve la instancia compartida en un proceso y envia el resultado."""
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()  # grupo propio, que incluye a los procesos de sus pools
+    apply_budget(algo, budget)
+    problem = attach(spec)
+    algo.solve(problem)
+    conn.send((algo.tour, algo.value, algo.niters, algo.nevals, algo.time, algo.trace,
+               algo.bound, algo.gap))
+    conn.close()
+
+
+def _stop(conn: Connection, proc: Process) -> None:
+    """Termina el proceso de un algoritmo y los procesos que haya creado."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except (AttributeError, OSError):
+        pass  # sin grupos de procesos, o el proceso aun no creo el suyo
+    proc.terminate()
+    proc.join()
+    conn.close()
@@ -24,11 +24,26 @@ Formulacion de estado completo para el Problema del Viajante:
     con 0 <= i <= n-3, i+2 <= j <= n-1.
     Notar que las aristas elegidas no deben ser adyacentes.
 
+    Opcionalmente tambien se consideran acciones que mueven un segmento
+    del tour a otro lugar, posiblemente invertido (or-opt si el segmento
+    tiene de 1 a 3 ciudades, 3-opt de insercion de segmento si es mas largo).
+    (i,j,k,rev): sacar el segmento [v_i+1,...,v_j] e insertarlo entre v_k y
+    v_k+1, invertido si rev es True. Las posiciones se toman modulo n, asi
+    que el segmento puede pasar por la posicion 0, y la arista k no debe ser
+    ninguna de las aristas i,...,j.
+
 * Resultado.
     resultado([v_0,...,v_n], (i,j)) =
         [v_0,...,v_i] ++ [v_j,...,v_i+1] ++ [v_j+1,...,v_n]
     Notar que [v_j,...,v_i+1] es el reverso de [v_i+1,...,v_j]
 
+* Tour.
+    Un estado tambien puede ser un Tour o un TwoLevelTour (ver tour.py):
+    el mismo ciclo sin repetir la primera ciudad, que los algoritmos
+    modifican en el lugar con self.apply(). En un tour la posicion n es
+    la posicion 0 y la ciudad 0 puede estar en cualquier posicion, pero
+    las acciones se interpretan igual.
+
 * Funcion objetivo:
     obj_val([v_0,v_1,...,v_n-1,v_n]) =
         - dist[v_0][v_1] - ... - dist[v_n-1][v_n]
@@ -37,20 +52,32 @@ Formulacion de estado completo para el Problema del Viajante:
 """
 
 from __future__ import annotations
-from typing import TypeVar
-from random import shuffle
-from networkx import Graph
+from typing import Callable, Hashable, TypeVar
+from random import Random, shuffle
+import numpy as np
+from networkx import Graph, to_numpy_array
+from bound import held_karp
+from construct import build
+from neighbors import nearest, nearest_from_matrix
+from tour import Tour, TwoLevelTour
+from tsplib import CoordDistances, TSPLIBInstance
 
 State = TypeVar('State')
 Action = TypeVar('Action')
 
 
 class OptProblem:
-    """Clase que representa un problema de optimizacion general (de maximización)."""
+    """Clase que representa un problema de optimizacion general (de maximización).
+
+    El atributo nevals cuenta las evaluaciones del objetivo, completas o
+    incrementales (una por accion evaluada), y lo usan los algoritmos para
+    respetar un presupuesto de evaluaciones.
+    """
 
     def __init__(self) -> None:
         """Construye una instancia de la clase."""
         self.init = None
+        self.nevals = 0  # Numero de evaluaciones del objetivo
 
     def actions(self, state: State) -> list[Action]:
         """Determina la lista de acciones que se pueden aplicar a un estado."""
@@ -60,10 +87,18 @@ class OptProblem:
         """Determina el estado resultado de aplicar una accion a un estado."""
         raise NotImplementedError
 
+    def apply(self, state: State, action: Action) -> None:
+        """Aplica una accion a un estado, modificandolo en el lugar."""
+        raise NotImplementedError
+
     def obj_val(self, state: State) -> float:
         """Determina el valor objetivo de un estado."""
         raise NotImplementedError
 
+    def delta(self, state: State, action: Action) -> float:
+        """Determina la variacion del valor objetivo al aplicar una accion a un estado."""
+        raise NotImplementedError
+
     def max_action(self, state: State) -> tuple[Action, float]:
         """Determina la accion que genera el sucesor con mayor valor objetivo para un estado dado.
 
@@ -72,12 +107,30 @@ class OptProblem:
         """
         raise NotImplementedError
 
+    def max_action_tabu(self, state: State, is_tabu: Callable[[Action], bool],
+                        aspiration: float) -> tuple[Action, float]:
+        """Determina la mejor accion admisible para la busqueda tabu.
+
+        Una accion es admisible si no es tabu, o si lo es pero el sucesor que
+        genera supera el umbral de aspiracion. Al igual que max_action(), la
+        idea es no generar los sucesores ni llamar a self.obj_val().
+        """
+        raise NotImplementedError
+
+    def attributes(self, state: State, action: Action) -> tuple[list[Hashable], list[Hashable]]:
+        """Determina los atributos que una accion quita y agrega a un estado.
 
+        Se usa en la busqueda tabu cuando la lista tabu guarda atributos en
+        lugar de acciones: al aplicar una accion los atributos que quita se
+        vuelven tabu, y una accion es tabu si vuelve a agregar alguno.
+        """
+        raise NotImplementedError
 
-    def random_reset(self) -> State:
+    def random_reset(self, rng: Random | None = None) -> State:
         """Retorna un estado generado al azar. 
         
         Este método será necesario para implementar el reinicion aleatorio.
+        Si se indica rng se usa ese generador en lugar del global.
         """
         raise NotImplementedError
 
@@ -85,70 +138,240 @@ class OptProblem:
 class TSP(OptProblem):
     """Subclase que representa al Problema del Viajante (TSP).
 
-    Un estado es una lista de enteros: list[int].
-    Una accion es un par de enteros: tuple[int,int].
+    Un estado es una lista de enteros: list[int], o un Tour.
+    Una accion 2-opt es un par de enteros: tuple[int,int].
+    Una accion de mover un segmento es una 4-upla: tuple[int,int,int,bool].
+
+    Las distancias se guardan en una matriz densa de NumPy (self.dist)
+    indexada desde 0, de modo que dist[u][v] es la distancia entre las
+    ciudades u y v del estado, sin necesidad de desplazar los indices.
+    En instancias muy grandes self.dist puede ser una tsplib.CoordDistances,
+    que se indexa igual (siempre como dist[u, v]) pero no guarda la matriz.
+
+    Las familias de acciones que se usan (self.neighborhoods) pueden ser:
+    '2opt', 'oropt' (segmentos de 1 a 3 ciudades) y '3opt' (segmentos de 4
+    a max_segment ciudades, insertados junto a un candidato de sus extremos).
+    actions(), max_action(), max_action_tabu() y first_action() combinan
+    todas las familias elegidas.
     """
 
-    def __init__(self, G: Graph) -> None:
+    NEIGHBORHOODS = ('2opt', 'oropt', '3opt')
+
+    def __init__(self, G: Graph | None,
+                 coords: dict[int, tuple[float, float]] | np.ndarray | None = None,
+                 k: int | None = None, neighborhoods: tuple[str, ...] = ('2opt',),
+                 max_segment: int = 50, dist: np.ndarray | CoordDistances | None = None,
+                 init: str | Callable = 'identity') -> None:
         """Construye una instancia de TSP.
 
         Argumentos:
         ==========
-        G: Graph
+        G: Graph | None
             grafo con los datos del problema
             los nodos del grafo se enumeran de 1 a n, ¡cuidado!
+        coords: dict[int, tuple[float, float]] | np.ndarray | None
+            coordenadas de cada ciudad, como las retorna load.read_tsp()
+            o como arreglo de n x 2 indexado desde 0
+            se usan para calcular las listas de candidatos
+        k: int | None
+            si se indica, max_action solo considera las acciones que unen una
+            ciudad con una de sus k ciudades mas cercanas
+        neighborhoods: tuple[str, ...]
+            familias de acciones a usar, entre '2opt', 'oropt' y '3opt'
+        max_segment: int
+            largo maximo de los segmentos que mueve la familia '3opt'
+        dist: np.ndarray | CoordDistances | None
+            matriz de distancias ya construida, indexada desde 0
+            si se indica no se usa G, que puede ser None (ver from_matrix())
+        init: str | Callable
+            constructor del estado inicial (ver construct.BUILDERS): 'identity',
+            'random', 'nn', 'greedy' o 'hilbert'
         """
         super().__init__()
+        for name in neighborhoods:
+            if name not in self.NEIGHBORHOODS:
+                raise ValueError("familia de acciones desconocida: {}".format(name))
         self.G = G
-        self.init = list(range(0, G.number_of_nodes()))
-        self.init.append(0)
+        if dist is None:
+            self.n = G.number_of_nodes()
+            self.dist = self._distance_matrix(G)
+        else:
+            self.n = len(dist)
+            self.dist = dist
+        self.coords = None
+        if isinstance(coords, dict):
+            self.coords = np.array([coords[i] for i in range(1, self.n + 1)], dtype=float)
+        elif coords is not None:
+            self.coords = np.asarray(coords)
+        self.k = k
+        self.neighborhoods = tuple(neighborhoods)
+        self.max_segment = max_segment
+        self._index = None  # acciones 2-opt vectorizadas, ver _two_opt_index()
+        self._or_index = None  # acciones or-opt vectorizadas, ver _oropt_index()
+        self._cand = None  # listas de candidatos, ver neighbors()
+        self._bound = None  # cota inferior, ver lower_bound()
+        self.init = build(init, self)
+
+    @classmethod
+    def from_matrix(cls, dist: np.ndarray, coords: np.ndarray | None = None, **kwargs) -> TSP:
+        """Construye una instancia de TSP a partir de la matriz de distancias, sin grafo.
+
+        La matriz no se copia, por lo que puede ser una vista de memoria
+        compartida o de un archivo.
+
+        Argumentos:
+        ==========
+        dist: np.ndarray
+            matriz de n x n de distancias, indexada desde 0
+        coords: np.ndarray | None
+            arreglo de n x 2 con las coordenadas de cada ciudad
+        kwargs:
+            el resto de los argumentos de TSP (k, neighborhoods, max_segment, init)
+
+        Retorno:
+        =======
+        problem: TSP
+            instancia con self.G = None
+        """
+        return cls(None, coords, dist=dist, **kwargs)
+
+    @classmethod
+    def from_tsplib(cls, instance: TSPLIBInstance, dense_limit: int = 10000,
+                    cache: bool = False, **kwargs) -> TSP:
+        """Construye una instancia de TSP a partir de una instancia leida con tsplib.read().
+
+        Si la instancia tiene mas de dense_limit ciudades y se define por
+        coordenadas, no se construye la matriz de distancias: self.dist es
+        una tsplib.CoordDistances, que calcula las distancias a demanda y
+        guarda en un cache las de las listas de candidatos. En ese caso, si no
+        se indica k se usan 10 candidatos, de modo que la memoria es O(n*k).
+
+        Argumentos:
+        ==========
+        instance: TSPLIBInstance
+            instancia TSPLIB, con sus coordenadas y/o matriz de distancias
+        dense_limit: int
+            cantidad maxima de ciudades para usar una matriz densa
+        cache: bool
+            si es True la matriz densa se lee del cache en disco, o se guarda
+            en el si no estaba (ver TSPLIBInstance.distance_matrix())
+        kwargs:
+            el resto de los argumentos de TSP (k, neighborhoods, max_segment, init)
+
+        Retorno:
+        =======
+        problem: TSP
+            instancia con self.G = None
+        """
+        if instance.weights is None and instance.n > dense_limit:
+            if kwargs.get('k') is None:
+                kwargs['k'] = 10
+            dist = CoordDistances(instance.coords, instance.kind,
+                                  cache_size=2 * instance.n * kwargs['k'])
+        else:
+            dist = instance.distance_matrix(cache)
+        return cls.from_matrix(dist, instance.coords, **kwargs)
+
+    def _distance_matrix(self, G: Graph) -> np.ndarray:
+        """Construye la matriz de distancias a partir del grafo.
+
+        Se construye una unica vez. Si todos los pesos son enteros (como en
+        las instancias TSPLIB) la matriz es de enteros, asi las sumas de
+        distancias son exactas.
+
+        Argumentos:
+        ==========
+        G: Graph
+            grafo con los datos del problema, nodos enumerados de 1 a n
 
-    def actions(self, state: list[int]) -> list[tuple[int, int]]:
+        Retorno:
+        =======
+        dist: np.ndarray
+            matriz de n x n con dist[u][v] = peso de la arista (u+1, v+1)
+        """
+        dist = to_numpy_array(G, nodelist=range(1, self.n + 1), weight='weight')
+        np.fill_diagonal(dist, 0)
+        if np.array_equal(dist, np.round(dist)):
+            dist = dist.astype(np.int64)
+        return dist
+
+    def actions(self, state: list[int] | Tour) -> list[tuple]:
         """Determina la lista de acciones que se pueden aplicar a un estado.
 
         Argumentos:
         ==========
-        state: list[int]
+        state: list[int] | Tour
             un estado
 
         Retorno:
         =======
-        act: list[tuple[int, int]]
+        act: list[tuple]
             lista de acciones
         """
         act = []
-        for i in range(0, self.G.number_of_nodes() - 2):
-            for j in range(i + 2, self.G.number_of_nodes()):
-                if (j + 1) % self.G.number_of_nodes() != i:
-                    act.append((i, j))
+        if '2opt' in self.neighborhoods:
+            for i in range(0, self.n - 2):
+                for j in range(i + 2, self.n):
+                    if (j + 1) % self.n != i:
+                        act.append((i, j))
+        for index in self._segment_indices(state):
+            act.extend(self._action(index, k) for k in range(len(index[0])))
         return act
 
-    def result(self, state: list[int], action: tuple[int, int]) -> list[int]:
+    def result(self, state: list[int] | Tour, action: tuple) -> list[int] | Tour:
         """Determina el estado que resulta de aplicar una accion a un estado.
 
         Argumentos:
         ==========
-        state: list[int]
+        state: list[int] | Tour
             un estado
-        action: tuple[int, int]
+        action: tuple
             una accion de self.acciones(state)
 
         Retorno:
         =======
-        succ: list[int]
-            estado sucesor
+        succ: list[int] | Tour
+            estado sucesor, del mismo tipo que state
         """
+        if isinstance(state, (Tour, TwoLevelTour)):
+            succ = state.copy()
+            self.apply(succ, action)
+            return succ
+        if len(action) == 4:
+            return self._segment_order(state, action)
         succ = list(state)  # copy of the current state
         i, j = action
         succ[i + 1: j+1] = state[i + 1: j+1][::-1]  # reverse
         return succ
 
-    def obj_val(self, state: list[int]) -> float:
+    def apply(self, state: list[int] | Tour, action: tuple) -> None:
+        """Aplica una accion a un estado, modificandolo en el lugar.
+
+        Sobre un Tour se invierte el lado mas corto del tour, sin copiarlo.
+        Mover un segmento equivale a dos o tres inversiones (ver moves()).
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        action: tuple
+            una accion de self.acciones(state)
+        """
+        if isinstance(state, (Tour, TwoLevelTour)):
+            for move in self.moves(state, action):
+                state.move(*move)
+        elif len(action) == 4:
+            state[:] = self._segment_order(state, action)
+        else:
+            i, j = action
+            state[i + 1: j+1] = state[i + 1: j+1][::-1]  # reverse
+
+    def obj_val(self, state: list[int] | Tour) -> float:
         """Determina el valor objetivo de un estado.
 
         Argumentos:
         ==========
-        state: list[int]
+        state: list[int] | Tour
             un estado
 
         Retorno:
@@ -156,61 +379,622 @@ class TSP(OptProblem):
         value: float
             valor objetivo
         """
-        value = 0
-        for i in range(0, self.G.number_of_nodes()):
-            u = state[i]+1  # origen
-            v = state[i+1]+1  # destino
-            value -= self.G.get_edge_data(u, v)['weight']
-        return value
+        self.nevals += 1
+        tour = self._closed(state)
+        value = -self.dist[tour[:-1], tour[1:]].sum()
+        return value.item()
+
+    def delta(self, state: list[int] | Tour, action: tuple) -> float:
+        """Determina la variacion del valor objetivo al aplicar una accion, en O(1).
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        action: tuple
+            una accion de self.acciones(state)
 
-    def max_action(self, state: list[int]) -> tuple[tuple[int, int], float]:
+        Retorno:
+        =======
+        delta: float
+            valor objetivo del sucesor menos valor objetivo de state
+        """
+        self.nevals += 1
+        n = self.n
+        dist = self.dist
+        if len(action) == 2:
+            i, j = action
+            a, b, c, d = state[i], state[i + 1], state[j], state[(j + 1) % n]
+            return (dist[a, b] + dist[c, d] - dist[a, c] - dist[b, d]).item()
+        i, j, k, rev = action
+        p, s1, s2, q = state[i], state[(i + 1) % n], state[j], state[(j + 1) % n]
+        x, y = state[k], state[(k + 1) % n]
+        sa, sb = (s2, s1) if rev else (s1, s2)
+        return (dist[p, s1] + dist[s2, q] + dist[x, y]
+                - dist[p, q] - dist[x, sa] - dist[sb, y]).item()
+
+    def max_action(self, state: list[int] | Tour, batch: bool = True) -> tuple[tuple, float]:
         """Determina la accion que genera el sucesor con mayor valor objetivo para un estado dado.
         
         Se encuentra optimizada y por razones de eficiencia no se generan los sucesores y 
         tampoco se llama a self.obj_val().
 
+        En modo batch se evaluan todas las acciones a la vez con NumPy
+        (ver self.deltas() y self.segment_deltas()) y se toma la de mayor
+        valor. Si no, se recorren las acciones una por una con self.delta().
+        En caso de empate ambos modos eligen la primera accion en el orden
+        de self.actions().
+
+        Si la instancia se construyo con k, solo se evaluan las acciones que
+        unen una ciudad con uno de sus k candidatos (ver self.neighbors()).
+
         Argumentos:
         ==========
-        state: list[int]
+        state: list[int] | Tour
             un estado
+        batch: bool
+            si es True se evalua todo el vecindario vectorizado
 
         Retorno:
         =======
-        max_act: tuple[int, int]
+        max_act: tuple
             accion que genera el sucesor con mayor valor objetivo
         max_val: float
             valor objetivo del sucesor que resulta de aplicar min_act
         """
         value = self.obj_val(state)
+        if batch or self.k is not None:
+            index, delta = self._neighborhood(state)
+            if len(delta) == 0:
+                return None, float("-inf")
+            k = int(np.argmax(delta))
+            return self._action(index, k), value + delta[k].item()
+
         max_act = None
         max_val = float("-inf")
         for a in self.actions(state):
-            i, j = a
-            v1 = state[i]+1  # origen de i
-            v2 = state[i+1]+1  # destino de i
-            v3 = state[j]+1  # origen de j
-            v4 = state[j+1]+1  # destino de j
-            distl1l2 = self.G.get_edge_data(v1, v2)['weight']
-            distl3l4 = self.G.get_edge_data(v3, v4)['weight']
-            distl1l3 = self.G.get_edge_data(v1, v3)['weight']
-            distl2l4 = self.G.get_edge_data(v2, v4)['weight']
-            succ_value =  value + distl1l2 + distl3l4 - distl1l3 - distl2l4
+            succ_value = value + self.delta(state, a)
             if succ_value > max_val:
                 max_act = a
                 max_val = succ_value
         return max_act, max_val
 
-    def random_reset(self) -> list[int]:
+    def max_action_tabu(self, state: list[int] | Tour, is_tabu: Callable[[tuple], bool],
+                        aspiration: float) -> tuple[tuple, float]:
+        """Determina la mejor accion admisible para la busqueda tabu.
+
+        Se evaluan todas las acciones con self._neighborhood() y se recorren de
+        mayor a menor valor hasta encontrar una admisible: que no sea tabu, o
+        que genere un sucesor con valor mayor a aspiration. Cada accion tabu
+        encontrada en el camino cuesta un argmax extra, pero como hay pocas
+        acciones tabu esto es mucho mas barato que evaluar cada sucesor.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        is_tabu: Callable[[tuple], bool]
+            predicado que indica si una accion es tabu
+        aspiration: float
+            una accion tabu se admite si su sucesor supera este valor
+
+        Retorno:
+        =======
+        max_act: tuple
+            mejor accion admisible, o None si no hay ninguna
+        max_val: float
+            valor objetivo del sucesor que resulta de aplicar max_act
+        """
+        value = self.obj_val(state)
+        index, delta = self._neighborhood(state)
+        score = delta.astype(float)  # copia donde se descartan las tabu
+        for _ in range(len(delta)):
+            k = int(np.argmax(score))
+            if score[k] == float("-inf"):
+                break
+            act = self._action(index, k)
+            succ_value = value + delta[k].item()
+            if not is_tabu(act) or succ_value > aspiration:
+                return act, succ_value
+            score[k] = float("-inf")
+        return None, float("-inf")
+
+    def attributes(self, state: list[int] | Tour, action: tuple
+                   ) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+        """Determina las aristas que una accion quita y agrega a un estado.
+
+        Cada arista se representa como un par ordenado (u, v) con u < v.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        action: tuple
+            una accion de self.acciones(state)
+
+        Retorno:
+        =======
+        removed: list[tuple[int, int]]
+            aristas del estado que la accion quita
+        added: list[tuple[int, int]]
+            aristas que la accion agrega
+        """
+        n = self.n
+        if len(action) == 2:
+            i, j = action
+            a, b, c, d = state[i], state[i+1], state[j], state[(j+1) % n]
+            removed = [(a, b), (c, d)]
+            added = [(a, c), (b, d)]
+        else:
+            i, j, k, rev = action
+            p, s1, s2, q = state[i], state[(i+1) % n], state[j], state[(j+1) % n]
+            x, y = state[k], state[(k+1) % n]
+            sa, sb = (s2, s1) if rev else (s1, s2)
+            removed = [(p, s1), (s2, q), (x, y)]
+            added = [(p, q), (x, sa), (sb, y)]
+        removed = [(min(u, v), max(u, v)) for u, v in removed]
+        added = [(min(u, v), max(u, v)) for u, v in added]
+        return removed, added
+
+    def deltas(self, state: list[int] | Tour, I: np.ndarray, J: np.ndarray) -> np.ndarray:
+        """Calcula la variacion del valor objetivo para un conjunto de acciones 2-opt.
+
+        La accion (i,j) quita las aristas (a,b) = (state[i],state[i+1]) y
+        (c,d) = (state[j],state[j+1]) y agrega (a,c) y (b,d), por lo que
+        la variacion es dist[a,b] + dist[c,d] - dist[a,c] - dist[b,d].
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        I, J: np.ndarray
+            arreglos de igual largo con las acciones (I[k], J[k])
+
+        Retorno:
+        =======
+        delta: np.ndarray
+            delta[k] es la variacion al aplicar la accion (I[k], J[k])
+        """
+        self.nevals += len(I)
+        tour = self._closed(state)
+        a = tour[I]
+        b = tour[I + 1]
+        c = tour[J]
+        d = tour[J + 1]
+        dist = self.dist
+        return dist[a, b] + dist[c, d] - dist[a, c] - dist[b, d]
+
+    def segment_deltas(self, state: list[int] | Tour, I: np.ndarray, J: np.ndarray,
+                       K: np.ndarray, R: np.ndarray) -> np.ndarray:
+        """Calcula la variacion del valor objetivo para un conjunto de movimientos de segmentos.
+
+        La accion (i,j,k,rev) saca el segmento s1..s2 que ocupa las posiciones
+        i+1..j y lo inserta entre x = state[k] e y = state[k+1], invertido si
+        rev es True. Quita las aristas (p,s1), (s2,q) y (x,y) y agrega (p,q),
+        (x,s1) y (s2,y), o (x,s2) y (s1,y) si se invierte.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        I, J, K, R: np.ndarray
+            arreglos de igual largo con las acciones (I[m], J[m], K[m], R[m])
+
+        Retorno:
+        =======
+        delta: np.ndarray
+            delta[m] es la variacion al aplicar la accion m
+        """
+        self.nevals += len(I)
+        n = self.n
+        tour = np.asarray(state)[:n]
+        p, s1 = tour[I], tour[(I + 1) % n]
+        s2, q = tour[J], tour[(J + 1) % n]
+        x, y = tour[K], tour[(K + 1) % n]
+        sa = np.where(R, s2, s1)
+        sb = np.where(R, s1, s2)
+        dist = self.dist
+        return dist[p, s1] + dist[s2, q] + dist[x, y] - dist[p, q] - dist[x, sa] - dist[sb, y]
+
+    def neighbors(self) -> np.ndarray:
+        """Retorna las listas de candidatos de cada ciudad.
+
+        Se calculan una sola vez: a partir de las coordenadas con grid
+        bucketing si estan disponibles, o de la matriz de distancias si no.
+
+        Retorno:
+        =======
+        cand: np.ndarray
+            arreglo de n x k, cand[u] son las k ciudades mas cercanas a u
+        """
+        if self._cand is None:
+            k = self.k if self.k is not None else 10
+            if self.coords is not None:
+                self._cand = nearest(self.coords, k)
+            else:
+                self._cand = nearest_from_matrix(self.dist, k)
+        return self._cand
+
+    def lower_bound(self) -> float:
+        """Retorna la cota de Held-Karp de la longitud del tour optimo.
+
+        Se calcula una sola vez, ver bound.held_karp(). Si las distancias se
+        calculan a demanda es una estimacion a partir de los candidatos.
+
+        Retorno:
+        =======
+        bound: float
+            cota inferior de la longitud (no del valor objetivo, que es
+            la longitud con signo negativo)
+        """
+        if self._bound is None:
+            self._bound, _ = held_karp(self)
+        return self._bound
+
+    def _neighborhood(self, state: list[int] | Tour) -> tuple[tuple[np.ndarray, ...], np.ndarray]:
+        """Evalua a la vez todas las acciones de las familias de self.neighborhoods.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+
+        Retorno:
+        =======
+        index: tuple[np.ndarray, ...]
+            acciones como arreglos (I, J, K, R), en las acciones 2-opt K = -1
+        delta: np.ndarray
+            variacion del valor objetivo de cada accion
+        """
+        parts = []
+        if '2opt' in self.neighborhoods:
+            I, J = self._candidate_index(state) if self.k is not None else self._two_opt_index()
+            m = len(I)
+            index = (I, J, np.full(m, -1), np.zeros(m, dtype=bool))
+            parts.append((index, self.deltas(state, I, J)))
+        for index in self._segment_indices(state):
+            parts.append((index, self.segment_deltas(state, *index)))
+        if len(parts) == 1:
+            return parts[0]
+        index = tuple(np.concatenate([part[0][c] for part in parts]) for c in range(4))
+        return index, np.concatenate([part[1] for part in parts])
+
+    def _action(self, index: tuple[np.ndarray, ...], k: int) -> tuple:
+        """Retorna la k-esima accion de un indice de acciones como tupla."""
+        I, J, K, R = index
+        if K[k] < 0:
+            return (int(I[k]), int(J[k]))
+        return (int(I[k]), int(J[k]), int(K[k]), bool(R[k]))
+
+    def _candidate_index(self, state: list[int] | Tour) -> tuple[np.ndarray, np.ndarray]:
+        """Retorna las acciones 2-opt que unen una ciudad con uno de sus candidatos.
+
+        La accion (i,j) agrega las aristas (state[i],state[j]) y
+        (state[i+1],state[j+1]). Para cada ciudad u y candidato v se generan
+        las dos acciones que agregan la arista (u,v), una por cada lado.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+
+        Retorno:
+        =======
+        I, J: np.ndarray
+            arreglos con las acciones (I[k], J[k]), de largo O(n*k)
+        """
+        n = self.n
+        tour = np.asarray(state)[:n]
+        pos = np.empty(n, dtype=np.int64)
+        pos[tour] = np.arange(n)
+
+        cand = self.neighbors()
+        p = np.repeat(pos, cand.shape[1])  # posicion de cada ciudad u
+        q = pos[cand.ravel()]  # posicion de cada candidato v
+        lo = np.minimum(p, q)
+        hi = np.maximum(p, q)
+
+        # (u,v) = (state[i],state[j]), o bien (u,v) = (state[i+1],state[j+1])
+        # teniendo en cuenta que la ciudad 0 tambien ocupa la posicion n
+        I = np.concatenate([lo, np.where(lo == 0, hi - 1, lo - 1)])
+        J = np.concatenate([hi, np.where(lo == 0, n - 1, hi - 1)])
+        valid = (I >= 0) & (J >= I + 2) & ~((I == 0) & (J == n - 1))
+        return I[valid], J[valid]
+
+    def _segment_indices(self, state: list[int] | Tour) -> list[tuple[np.ndarray, ...]]:
+        """Retorna las acciones de mover segmentos de las familias elegidas.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+
+        Retorno:
+        =======
+        indices: list[tuple[np.ndarray, ...]]
+            una tupla (I, J, K, R) por familia
+        """
+        indices = []
+        if 'oropt' in self.neighborhoods:
+            if self.k is None:
+                indices.append(self._oropt_index())
+            else:
+                indices.append(self._insertion_index(state, range(1, 4)))
+        if '3opt' in self.neighborhoods:
+            longest = min(self.max_segment, self.n // 2)
+            indices.append(self._insertion_index(state, range(4, longest + 1)))
+        return indices
+
+    def _oropt_index(self) -> tuple[np.ndarray, ...]:
+        """Retorna todas las acciones or-opt como arreglos (I, J, K, R).
+
+        Para cada segmento de 1 a 3 ciudades se consideran todas las aristas
+        donde insertarlo, en ambos sentidos (salvo los segmentos de una
+        ciudad, donde el sentido no importa). Las acciones no dependen del
+        estado, asi que se calculan una sola vez.
+        """
+        if self._or_index is None:
+            n = self.n
+            parts = []
+            for L in range(1, 4):
+                if L > n - 3:
+                    break
+                m = n - L - 1  # aristas fuera del segmento
+                I = np.repeat(np.arange(n), m)
+                J = (I + L) % n
+                K = (I + L + 1 + np.tile(np.arange(m), n)) % n
+                for rev in ((False,) if L == 1 else (False, True)):
+                    parts.append((I, J, K, np.full(len(I), rev)))
+            if not parts:
+                empty = np.empty(0, dtype=np.int64)
+                parts.append((empty, empty, empty, np.empty(0, dtype=bool)))
+            self._or_index = tuple(np.concatenate([part[c] for part in parts]) for c in range(4))
+        return self._or_index
+
+    def _insertion_index(self, state: list[int] | Tour, lengths: range) -> tuple[np.ndarray, ...]:
+        """Retorna los movimientos de segmentos que unen un extremo con un candidato.
+
+        Para cada segmento de largo en lengths y cada candidato v de uno de
+        sus extremos, se inserta el segmento junto a v (antes o despues) de
+        modo que ese extremo quede unido a v. Son O(n*k) acciones por largo.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        lengths: range
+            largos de segmento a considerar
+
+        Retorno:
+        =======
+        I, J, K, R: np.ndarray
+            arreglos con las acciones (I[m], J[m], K[m], R[m])
+        """
+        n = self.n
+        tour = np.asarray(state)[:n]
+        pos = np.empty(n, dtype=np.int64)
+        pos[tour] = np.arange(n)
+        cand = self.neighbors()
+        kk = cand.shape[1]
+
+        parts = []
+        i = np.arange(n)
+        for L in lengths:
+            if L > n - 3:
+                break
+            j = (i + L) % n
+            I = np.repeat(i, kk)
+            J = np.repeat(j, kk)
+            P1 = pos[cand[tour[(i + 1) % n]]].ravel()  # posiciones de candidatos de s1
+            P2 = pos[cand[tour[j]]].ravel()  # posiciones de candidatos de s2
+            # x = v unido a s1, y = v unido a s1, x = v unido a s2, y = v unido a s2
+            options = [(P1, False), ((P1 - 1) % n, True)]
+            if L > 1:
+                options += [(P2, True), ((P2 - 1) % n, False)]
+            for K, rev in options:
+                valid = (K - I) % n > L
+                parts.append((I[valid], J[valid], K[valid], np.full(valid.sum(), rev and L > 1)))
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty, np.empty(0, dtype=bool)
+        return tuple(np.concatenate([part[c] for part in parts]) for c in range(4))
+
+    def positions(self, state: list[int] | Tour) -> np.ndarray:
+        """Determina la posicion de cada ciudad en un estado.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+
+        Retorno:
+        =======
+        pos: np.ndarray
+            pos[u] es la posicion de la ciudad u en state, con pos[0] = 0
+        """
+        if isinstance(state, (Tour, TwoLevelTour)):
+            return state.pos
+        pos = np.empty(self.n, dtype=np.int64)
+        pos[np.asarray(state)[:self.n]] = np.arange(self.n)
+        return pos
+
+    def first_action(self, state: list[int] | Tour, city: int,
+                     pos: np.ndarray | None = None) -> tuple[tuple, float]:
+        """Determina la primera accion que mejora el estado y toca a una ciudad.
+
+        Con '2opt' se prueban las acciones que agregan una arista (city, v),
+        con v en la lista de candidatos de city, quitando la arista de city con
+        su sucesor o con su predecesor. Como los candidatos estan ordenados por
+        distancia, se corta en cuanto dist[city][v] no es menor que la arista
+        quitada, pues a partir de ahi ninguna accion puede mejorar.
+
+        Con 'oropt' ademas se prueba mover los segmentos de 1 a 3 ciudades que
+        empiezan o terminan en city, insertandolos junto a un candidato de
+        alguno de sus extremos.
+
+        Argumentos:
+        ==========
+        state: list[int] | Tour
+            un estado
+        city: int
+            ciudad alrededor de la cual se buscan acciones
+        pos: np.ndarray | None
+            posiciones de las ciudades en state, ver self.positions()
+            si no se indica se calculan (en un Tour ya estan disponibles)
+
+        Retorno:
+        =======
+        act: tuple
+            primera accion encontrada que mejora el estado, o None
+        delta: float
+            mejora en el valor objetivo que produce act
+        """
+        n = self.n
+        dist = self.dist
+        if pos is None:
+            pos = self.positions(state)
+        p = int(pos[city])
+        if '2opt' in self.neighborhoods:
+            for e1, side in ((p, 1), ((p - 1) % n, 0)):
+                # side = 1: se quita (city, sucesor), side = 0: (predecesor, city)
+                other = state[e1 + side]
+                removed = dist[state[e1], state[e1 + 1]]
+                for v in self.neighbors()[city]:
+                    added = dist[city, v]
+                    if added >= removed:
+                        break
+                    e2 = int(pos[v]) if side else (int(pos[v]) - 1) % n
+                    i, j = min(e1, e2), max(e1, e2)
+                    if j < i + 2 or (i == 0 and j == n - 1):
+                        continue
+                    w = state[e2 + side]  # vecino de v del mismo lado
+                    self.nevals += 1
+                    delta = removed + dist[state[e2], state[e2 + 1]] - added - dist[other, w]
+                    if delta > 0:
+                        return (i, j), delta.item()
+        if 'oropt' in self.neighborhoods:
+            return self._first_segment(state, p, pos)
+        return None, 0
+
+    def _first_segment(self, state: list[int] | Tour, p: int,
+                       pos: np.ndarray) -> tuple[tuple, float]:
+        """Busca un movimiento or-opt que mejore, con un extremo del segmento en la posicion p."""
+        n = self.n
+        dist = self.dist
+        cand = self.neighbors()
+        for L in range(1, 4):
+            if L > n - 3:
+                break
+            for i in ((p - 1) % n, (p - L) % n):
+                j = (i + L) % n
+                a, s1, s2, b = state[i], state[(i + 1) % n], state[j], state[(j + 1) % n]
+                gain = dist[a, s1] + dist[s2, b] - dist[a, b]
+                if gain <= 0:
+                    continue
+                for end in ((s1,) if L == 1 else (s1, s2)):
+                    for v in cand[end]:
+                        pv = int(pos[v])
+                        # v queda antes (x = v) o despues (y = v) del extremo
+                        for k, rev in ((pv, end != s1), ((pv - 1) % n, end == s1)):
+                            if (k - i) % n <= L:
+                                continue
+                            rev = rev and L > 1
+                            x, y = state[k], state[(k + 1) % n]
+                            sa, sb = (s2, s1) if rev else (s1, s2)
+                            self.nevals += 1
+                            delta = gain + dist[x, y] - dist[x, sa] - dist[sb, y]
+                            if delta > 0:
+                                return (i, j, k, rev), delta.item()
+        return None, 0
+
+    def _closed(self, state: list[int] | Tour) -> np.ndarray:
+        """Retorna el estado como arreglo de n+1 ciudades, cerrando el ciclo."""
+        tour = np.asarray(state)
+        if len(tour) == self.n:
+            tour = np.append(tour, tour[0])
+        return tour
+
+    def _two_opt_index(self) -> tuple[np.ndarray, np.ndarray]:
+        """Retorna todas las acciones 2-opt como dos arreglos (I, J).
+
+        Las acciones no dependen del estado, asi que se calculan una sola vez.
+        Estan en el mismo orden que self.actions().
+        """
+        if self._index is None:
+            I, J = np.triu_indices(self.n, k=2)
+            valid = ~((I == 0) & (J == self.n - 1))
+            self._index = (I[valid], J[valid])
+        return self._index
+
+    def _segment_order(self, state: list[int], action: tuple[int, int, int, bool]) -> list[int]:
+        """Construye el estado que resulta de mover un segmento, como lista."""
+        n = self.n
+        i, j, k, rev = action
+        L = (j - i) % n
+        order = np.roll(np.asarray(state)[:n], -(i + 1))  # el segmento queda al principio
+        seg, rest = order[:L], order[L:]
+        if rev:
+            seg = seg[::-1]
+        m = (k - j - 1) % n + 1  # rest[m-1] es state[k]
+        order = np.concatenate([rest[:m], seg, rest[m:]])
+        order = np.roll(order, -int(np.flatnonzero(order == 0)[0])).tolist()
+        order.append(0)
+        return order
+
+    def moves(self, state: Tour | TwoLevelTour, action: tuple) -> list[tuple[int, int, int, int]]:
+        """Traduce una accion a movimientos 2-opt expresados con ciudades.
+
+        Cada movimiento (a,b,c,d) reemplaza las aristas {a,b} y {c,d} por {a,c}
+        y {b,d} (ver Tour.move()). Como no depende de posiciones, se deshace
+        con el movimiento (a,c,b,d), aplicando los movimientos en orden inverso.
+
+        Mover un segmento p s1..s2 q ... x y son dos o tres movimientos: primero
+        (p,s1),(x,y) -> (p,x),(s1,y) y luego (p,x),(q,s2) -> (p,q),(x,s2), lo
+        que deja el segmento invertido entre x e y. Si no se pide invertirlo,
+        se invierte de nuevo.
+
+        Argumentos:
+        ==========
+        state: Tour | TwoLevelTour
+            un estado
+        action: tuple
+            una accion de self.acciones(state)
+
+        Retorno:
+        =======
+        moves: list[tuple[int, int, int, int]]
+            movimientos a aplicar en orden con state.move()
+        """
+        n = self.n
+        if len(action) == 2:
+            i, j = action
+            return [(state[i], state[i + 1], state[j], state[(j + 1) % n])]
+        i, j, k, rev = action
+        p, s1, s2, q = state[i], state[(i + 1) % n], state[j], state[(j + 1) % n]
+        x, y = state[k], state[(k + 1) % n]
+        moves = [(p, s1, x, y), (p, x, q, s2)]
+        if not rev:
+            moves.append((x, s2, s1, y))
+        return moves
+
+    def random_reset(self, rng: Random | None = None) -> list[int]:
         """Devuelve un estado del TSP con un tour aleatorio.
+
+        Argumentos:
+        ==========
+        rng: Random | None
+            generador de numeros aleatorios, por defecto el del modulo random
         
         Retorno:
         =======
         state: list[int]
             un estado
         """
-        state = [i for i in range(1, self.G.number_of_nodes())]
-        shuffle(state)  # mezclar la lista
+        state = [i for i in range(1, self.n)]
+        if rng is None:
+            shuffle(state)  # mezclar la lista
+        else:
+            rng.shuffle(state)
         state.append(0)  # agregar a 0 como inicio del tour
         state.insert(0, 0)  # agregar a 0 como fin del tour
         return state
-
@@ -7,33 +7,183 @@ Las subclases que se encuentran en este modulo son:
 * HillClimbing: algoritmo de ascension de colinas. Se mueve al sucesor con
 mejor valor objetivo. Ya viene implementado.
 
+* FirstImprovement: algoritmo de ascension de colinas de primera mejora.
+Aplica la primera accion que mejora, buscando solo alrededor de las ciudades
+activas (don't-look bits).
+
 * HillClimbingReset: algoritmo de ascension de colinas de reinicio aleatorio.
-No viene implementado, se debe completar.
+Los reinicios se pueden repartir entre varios procesos.
+
+* Tabu: algoritmo de busqueda tabu. Se mueve al mejor sucesor que no es
+tabu, aunque empeore, y evalua los movimientos de forma incremental.
+
+* LinKernighan: busqueda de profundidad variable al estilo Lin-Kernighan.
+Encadena movimientos 2-opt guiados por las listas de candidatos.
+
+* IteratedLocalSearch: busqueda local iterada. Perturba el tour con
+movimientos double-bridge y lo reoptimiza alrededor de las ciudades tocadas.
+
+* SimulatedAnnealing: recocido simulado con movimientos aleatorios evaluados
+en O(1), enfriamiento geometrico y recalentamientos.
 
-* Tabu: algoritmo de busqueda tabu.
-No viene implementado, se debe completar.
+* HeldKarp: algoritmo exacto por programacion dinamica sobre subconjuntos,
+vectorizada con NumPy. Solo para instancias de hasta unas 20 ciudades.
+
+* BranchAndBound: algoritmo exacto de ramificacion y acotacion con cotas de
+1-tree, para instancias medianas.
+
+Todos aceptan los limites time_limit y max_evals y registran la evolucion
+del mejor valor encontrado en el atributo trace (ver LocalSearch).
 """
 
 
 from __future__ import annotations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import heapq
+import os
+from random import Random
+import random
 from time import time
-from problem import OptProblem
+from typing import Callable
+import numpy as np
+from bound import one_tree, subgradient
+from construct import build
+from problem import OptProblem, TSP
+from shared import SharedTSP, attach
+from tabu import TabuList
+from tour import Tour, TwoLevelTour
+from unionfind import find
 
 
 class LocalSearch:
-    """Clase que representa un algoritmo de busqueda local general."""
+    """Clase que representa un algoritmo de busqueda local general.
+
+    Todos los algoritmos se pueden usar como algoritmos anytime: se detienen
+    al agotar time_limit segundos o max_evals evaluaciones del objetivo
+    (contadas por el problema en problem.nevals) y retornan el mejor estado
+    encontrado hasta ese momento. Los limites se controlan entre iteraciones,
+    por lo que una iteracion ya empezada siempre termina.
+
+    Cada mejora del mejor valor se registra en self.trace, un arreglo de
+    NumPy con una fila (segundos, iteracion, mejor valor) por mejora, y se
+    informa a on_improvement(valor, iteracion, segundos) si se indica.
 
-    def __init__(self) -> None:
-        """Construye una instancia de la clase."""
+    Con target_gap se calcula la cota inferior del problema (ver
+    TSP.lower_bound()) y el algoritmo tambien se detiene en cuanto el mejor
+    tour esta a menos de target_gap por ciento de ella. En ese caso, al
+    terminar self.bound es la cota y self.gap el porcentaje en que la
+    longitud del tour la supera, una garantia de su calidad.
+    """
+
+    def __init__(self, two_level: bool = False, time_limit: float | None = None,
+                 max_evals: int | None = None,
+                 on_improvement: Callable[[float, int, float], None] | None = None,
+                 target_gap: float | None = None) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        two_level: bool
+            si es True los tours se representan con TwoLevelTour, pensado
+            para instancias muy grandes, en lugar de Tour
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos
+        max_evals: int | None
+            cantidad maxima de evaluaciones del objetivo (completas o
+            incrementales)
+        on_improvement: Callable[[float, int, float], None] | None
+            funcion que se llama con (valor, iteracion, segundos) cada vez
+            que mejora el mejor valor
+        target_gap: float | None
+            porcentaje por encima de la cota inferior con el que el tour se
+            considera suficientemente bueno
+        """
         self.niters = 0  # Numero de iteraciones totales
+        self.nevals = 0  # Numero de evaluaciones del objetivo
         self.time = 0  # Tiempo de ejecucion
         self.tour = []  # Solucion, inicialmente vacia
         self.value = None  # Valor objetivo de la solucion
+        self.trace = np.empty((0, 3))  # Mejoras: (segundos, iteracion, valor)
+        self.two_level = two_level  # Representacion de los tours
+        self.time_limit = time_limit
+        self.max_evals = max_evals
+        self.on_improvement = on_improvement
+        self.target_gap = target_gap
+        self.bound = None  # Cota inferior de la longitud, con target_gap
+        self.gap = None  # Porcentaje de la longitud por encima de la cota
+
+    def new_tour(self, state: list[int]) -> Tour | TwoLevelTour:
+        """Construye el tour que el algoritmo modifica en el lugar."""
+        return TwoLevelTour(state) if self.two_level else Tour(state)
 
     def solve(self, problem: OptProblem):
         """Resuelve un problema de optimizacion."""
-        self.tour = problem.init
-        self.value = problem.obj_val(problem.init)
+        self._begin(problem)
+        self._finish(problem.init, problem.obj_val(problem.init))
+
+    def _begin(self, problem: OptProblem) -> None:
+        """Pone en cero el reloj, los contadores y la traza."""
+        self._start = time()
+        self._problem = problem
+        self._evals0 = problem.nevals
+        self._trace = []
+        self._best_value = float('-inf')
+        self.niters = 0
+        self.nevals = 0
+        self.bound = self.gap = None
+        self._target = None
+        if self.target_gap is not None:
+            self.bound = problem.lower_bound()
+            self._target = -self.bound * (1 + self.target_gap / 100)
+
+    def _solved(self) -> bool:
+        """Determina si el mejor tour ya esta dentro de target_gap de la cota."""
+        return self._target is not None and self._best_value >= self._target
+
+    def _exhausted(self, pending: int = 0) -> bool:
+        """Determina si se agoto el tiempo o las evaluaciones, o se alcanzo target_gap.
+
+        pending son evaluaciones ya hechas que todavia no se sumaron a
+        problem.nevals.
+        """
+        if self._solved():
+            return True
+        if self.time_limit is not None and time() - self._start >= self.time_limit:
+            return True
+        return (self.max_evals is not None
+                and self._problem.nevals - self._evals0 + pending >= self.max_evals)
+
+    def _remaining(self) -> tuple[float | None, int | None]:
+        """Tiempo y evaluaciones que quedan del presupuesto, None si no hay limite."""
+        seconds = evals = None
+        if self.time_limit is not None:
+            seconds = max(0.0, self._start + self.time_limit - time())
+        if self.max_evals is not None:
+            evals = max(0, self.max_evals - (self._problem.nevals - self._evals0))
+        return seconds, evals
+
+    def _deadline(self) -> float | None:
+        """Instante (segun time()) en que se agota el tiempo, o None."""
+        return None if self.time_limit is None else self._start + self.time_limit
+
+    def _improved(self, value: float) -> None:
+        """Registra una mejora del mejor valor."""
+        self._best_value = max(self._best_value, value)
+        elapsed = time() - self._start
+        self._trace.append((elapsed, self.niters, value))
+        if self.on_improvement is not None:
+            self.on_improvement(value, self.niters, elapsed)
+
+    def _finish(self, tour: list[int], value: float) -> None:
+        """Guarda la solucion, el tiempo, las evaluaciones y la traza."""
+        self.tour = tour
+        self.value = value
+        self.time = time() - self._start
+        self.nevals += self._problem.nevals - self._evals0
+        self.trace = np.array(self._trace, dtype=float).reshape(-1, 3)
+        if self.bound is not None and value is not None:
+            self.gap = 100 * (-value - self.bound) / self.bound
 
 
 class HillClimbing(LocalSearch):
@@ -52,13 +202,14 @@ class HillClimbing(LocalSearch):
             un problema de optimizacion
         """
         # Inicio del reloj
-        start = time()
+        self._begin(problem)
 
         # Arrancamos del estado inicial
-        actual = problem.init
+        actual = self.new_tour(problem.init)
         value = problem.obj_val(problem.init)
+        self._improved(value)
 
-        while True:
+        while not self._exhausted():
 
             # Buscamos la acción que genera el sucesor con mayor valor objetivo
             accion, valor_sucesor = problem.max_action(actual)
@@ -66,114 +217,1311 @@ class HillClimbing(LocalSearch):
             # Retornar si estamos en un maximo local:
             # el valor objetivo del sucesor es menor o igual al del estado actual
             if valor_sucesor <= value:
+                break
 
-                self.tour = actual
-                self.value = value
-                end = time()
-                self.time = end-start
-                return
-
-            # Sino, nos movemos al sucesor
-            actual = problem.result(actual, accion)
+            # Sino, nos movemos al sucesor (modificando el tour en el lugar)
+            problem.apply(actual, accion)
             value = valor_sucesor
             self.niters += 1
+            self._improved(value)
+
+        self._finish(actual.tolist(), value)
+
+
+class FirstImprovement(LocalSearch):
+    """Ascension de colinas de primera mejora con don't-look bits.
+
+    En lugar de buscar el mejor sucesor, aplica la primera accion que mejora
+    el estado. Mantiene una cola de ciudades activas: para cada una se buscan
+    acciones alrededor de ella usando sus candidatos (ver TSP.first_action()).
+    Si no hay ninguna, la ciudad se desactiva (se enciende su don't-look bit).
+    Al aplicar una accion se reactivan solo las ciudades de las aristas
+    tocadas. El criterio de parada es que no queden ciudades activas.
+    """
+
+    def solve(self, problem: TSP):
+        """Resuelve un TSP con ascension de colinas de primera mejora.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un TSP
+        """
+        self._begin(problem)
+
+        actual = self.new_tour(problem.init)
+        value = problem.obj_val(actual)
+        self._improved(value)
+
+        # Al principio todas las ciudades estan activas
+        cola = deque(problem.init[:-1])
+        activa = [True] * problem.n
+
+        def on_move(mejora):
+            self.niters += 1
+            self._improved(value + mejora)
+
+        mejora, _ = _descend(problem, actual, cola, activa, stop=self._exhausted,
+                             on_move=on_move)
+
+        self._finish(actual.tolist(), value + mejora)
+
+
+def _descend(problem: TSP, actual: Tour | TwoLevelTour, cola: deque, activa: list[bool],
+             journal: list[tuple[int, int, int, int]] | None = None,
+             stop: Callable[[], bool] | None = None,
+             on_move: Callable[[float], None] | None = None) -> tuple[float, int]:
+    """Aplica primeras mejoras alrededor de las ciudades activas hasta que no quede ninguna.
+
+    Es el ciclo de FirstImprovement: se toma una ciudad de la cola, se la
+    desactiva y, si hay una accion que mejora alrededor de ella, se aplica
+    y se reactivan los extremos de las aristas tocadas.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un TSP
+    actual: Tour | TwoLevelTour
+        tour a mejorar, se modifica en el lugar
+    cola: deque
+        ciudades activas, al terminar queda vacia
+    activa: list[bool]
+        activa[c] indica si c esta en la cola
+    journal: list[tuple[int, int, int, int]] | None
+        si se indica, se le agregan los movimientos aplicados (ver TSP.moves())
+    stop: Callable[[], bool] | None
+        si se indica, se termina antes en cuanto retorne True
+    on_move: Callable[[float], None] | None
+        si se indica, se llama con la mejora acumulada tras cada accion
+
+    Retorno:
+    =======
+    mejora: float
+        mejora total del valor objetivo
+    iters: int
+        cantidad de acciones aplicadas
+    """
+    mejora_total = 0
+    iters = 0
+    while cola and (stop is None or not stop()):
+        ciudad = cola.popleft()
+        activa[ciudad] = False
+
+        accion, mejora = problem.first_action(actual, ciudad)
+        if accion is None:
+            continue
+
+        # Aplicar la accion y reactivar los extremos de las aristas tocadas
+        tocadas = {c for arista in problem.attributes(actual, accion)[0] for c in arista}
+        for mov in problem.moves(actual, accion):
+            actual.move(*mov)
+            if journal is not None:
+                journal.append(mov)
+        mejora_total += mejora
+        iters += 1
+        if on_move is not None:
+            on_move(mejora_total)
+        for c in tocadas:
+            if not activa[c]:
+                activa[c] = True
+                cola.append(c)
+    return mejora_total, iters
 
 
 class HillClimbingReset(LocalSearch):
-    """Ascensión de colinas con reinicio aleatorio."""
+    """Ascensión de colinas con reinicio aleatorio.
+
+    Cada reinicio es una ascension de colinas desde un estado aleatorio,
+    generado con su propia semilla: un tour al azar o, si se indica init,
+    una variante aleatoria de un tour construido (ver construct.py). Como
+    los reinicios son independientes, con workers > 1 se reparten entre
+    procesos (ver _restart()) y el mejor resultado se elige en el proceso
+    principal.
+
+    Con time_limit los reinicios que no terminan a tiempo se cortan en su
+    mejor estado, y max_evals se reparte en partes iguales entre los
+    reinicios, de modo que el resultado no depende de workers.
+    """
+
+    def __init__(self, n_reinicios: int = 15, two_level: bool = False,
+                 workers: int = 1, seed: int | None = None, init: str | None = None,
+                 **kwargs) -> None:
+        """Construye una instancia de la clase.
 
-    def __init__(self, n_reinicios=15):
-        super().__init__()
+        Argumentos:
+        ==========
+        n_reinicios: int
+            cantidad de reinicios
+        two_level: bool
+            si es True los tours se representan con TwoLevelTour
+        workers: int
+            cantidad de procesos, con 1 los reinicios se hacen en este proceso
+            y con None se usan todos los nucleos
+        seed: int | None
+            semilla de la que se derivan las de cada reinicio, por defecto se
+            derivan del generador del modulo random
+        init: str | None
+            constructor de los estados iniciales ('nn', 'greedy', 'hilbert'),
+            por defecto se usa problem.random_reset()
+        kwargs:
+            time_limit, max_evals y on_improvement, ver LocalSearch
+        """
+        super().__init__(two_level, **kwargs)
         self.n_reinicios = n_reinicios
+        self.workers = workers
+        self.seed = seed
+        self.init = init
 
     def solve(self, problem: OptProblem):
         """Resuelve un problema con múltiples reinicios aleatorios."""
-        start = time()
+        self._begin(problem)
+
+        rng = random if self.seed is None else Random(self.seed)
+        semillas = [rng.getrandbits(32) for _ in range(self.n_reinicios)]
+
+        max_evals = None
+        if self.max_evals is not None:
+            max_evals = max(1, self.max_evals // max(1, self.n_reinicios))
+        opciones = [(self.two_level, self.init, self._deadline(), max_evals)] * len(semillas)
+        if self.workers == 1:
+            resultados = ((k, _restart(problem, s, *o))
+                          for k, (s, o) in enumerate(zip(semillas, opciones)))
+            mejor_tour, mejor_valor, evals = self._best(resultados)
+        elif isinstance(problem, TSP):
+            # Los procesos leen la instancia de memoria compartida
+            if problem.k is not None or self.init is not None:
+                problem.neighbors()  # calcular los candidatos una sola vez
+            with SharedTSP(problem) as shared:
+                pool = ProcessPoolExecutor(self.workers, initializer=_init_shared_worker,
+                                           initargs=(shared.spec,))
+                mejor_tour, mejor_valor, evals = self._best_of_pool(pool, semillas, opciones)
+        else:
+            pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                       initargs=(problem,))
+            mejor_tour, mejor_valor, evals = self._best_of_pool(pool, semillas, opciones)
+
+        # Las evaluaciones de los procesos no pasan por problem.nevals
+        if self.workers != 1:
+            self.nevals += evals
+        self._finish(mejor_tour, mejor_valor)
+
+    def _best_of_pool(self, pool: ProcessPoolExecutor, semillas: list[int],
+                      opciones: list[tuple]) -> tuple[list[int], float, int]:
+        """Reparte los reinicios en el pool y elige el mejor en orden de llegada.
+
+        Al alcanzar target_gap se cancelan los reinicios que todavia no
+        empezaron, y solo se esperan los que estan en curso.
+        """
+        try:
+            futuros = {pool.submit(_restart_worker, s, o): k
+                       for k, (s, o) in enumerate(zip(semillas, opciones))}
+            return self._best((futuros[f], f.result()) for f in as_completed(futuros))
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _best(self, resultados) -> tuple[list[int], float, int]:
+        """Elige el mejor resultado de los reinicios, a medida que llegan.
 
+        resultados son pares (k, resultado de _restart()) en cualquier orden.
+        Entre reinicios de igual valor se elige el de menor k, asi el tour no
+        depende del orden de llegada.
+        """
         mejor_tour = None
         mejor_valor = float('-inf')
-        total_iters = 0
+        mejor_k = -1
+        total_evals = 0
+        for k, (tour, value, iters, evals) in resultados:
+            self.niters += iters
+            total_evals += evals
+            if value > mejor_valor or (value == mejor_valor and k < mejor_k):
+                if value > mejor_valor:
+                    self._improved(value)
+                mejor_valor, mejor_tour, mejor_k = value, tour, k
+                if self._solved():
+                    break  # ya se alcanzo target_gap
+        return mejor_tour, mejor_valor, total_evals
 
-        for _ in range(self.n_reinicios):
-            actual = problem.random_reset()  
-            value = problem.obj_val(actual)
 
-            while True:
-                accion, valor_sucesor = problem.max_action(actual)
+def _restart(problem: OptProblem, seed: int, two_level: bool, init: str | None = None,
+             deadline: float | None = None,
+             max_evals: int | None = None) -> tuple[list[int], float, int, int]:
+    """Realiza un reinicio de HillClimbingReset.
 
-                if valor_sucesor <= value:
-                    break
+    Argumentos:
+    ==========
+    problem: OptProblem
+        un problema de optimizacion
+    seed: int
+        semilla del estado inicial
+    two_level: bool
+        si es True el tour se representa con TwoLevelTour
+    init: str | None
+        constructor del estado inicial, o None para problem.random_reset()
+    deadline: float | None
+        instante (segun time()) en que se corta el reinicio
+    max_evals: int | None
+        cantidad maxima de evaluaciones del objetivo del reinicio
+
+    Retorno:
+    =======
+    tour: list[int]
+        optimo local encontrado, o mejor estado si se corto antes
+    value: float
+        valor objetivo de tour
+    iters: int
+        cantidad de iteraciones
+    evals: int
+        cantidad de evaluaciones del objetivo
+    """
+    evals0 = problem.nevals
+    if init is None:
+        state = problem.random_reset(Random(seed))
+    else:
+        state = build(init, problem, Random(seed))
+    actual = TwoLevelTour(state) if two_level else Tour(state)
+    value = problem.obj_val(actual)
+    iters = 0
+
+    while deadline is None or time() < deadline:
+        if max_evals is not None and problem.nevals - evals0 >= max_evals:
+            break
+
+        accion, valor_sucesor = problem.max_action(actual)
+
+        if valor_sucesor <= value:
+            break
+
+        problem.apply(actual, accion)
+        value = valor_sucesor
+        iters += 1
+
+    return actual.tolist(), value, iters, problem.nevals - evals0
 
-                actual = problem.result(actual, accion)
-                value = valor_sucesor
-                total_iters += 1
 
-            if value > mejor_valor:
-                mejor_valor = value
-                mejor_tour = actual
+# Problema de cada proceso, se envia una sola vez al crearlo
+_worker_problem = None
 
-        self.tour = mejor_tour
-        self.value = mejor_valor
-        self.niters = total_iters
-        self.time = time() - start
 
+def _init_worker(problem: OptProblem) -> None:
+    """Guarda el problema en el proceso, para no enviarlo con cada tarea."""
+    global _worker_problem
+    _worker_problem = problem
 
 
+def _init_shared_worker(spec: dict) -> None:
+    """Guarda en el proceso un TSP conectado a la memoria compartida, ver shared.attach()."""
+    global _worker_problem
+    _worker_problem = attach(spec)
 
 
+def _restart_worker(seed: int, opciones: tuple) -> tuple[list[int], float, int, int]:
+    """Realiza un reinicio sobre el problema del proceso, ver _restart()."""
+    return _restart(_worker_problem, seed, *opciones)
+
 
 class Tabu(LocalSearch):
-    """Algoritmo de búsqueda tabú."""
+    """Algoritmo de búsqueda tabú.
+
+    En cada iteracion se mueve al mejor sucesor admisible, aunque empeore.
+    Lo aplicado en las ultimas iteraciones es tabu, salvo que genere un estado
+    mejor que el mejor encontrado hasta el momento (criterio de aspiracion).
+    El criterio de parada es no mejorar durante max_stops iteraciones.
+
+    La lista tabu puede guardar las acciones aplicadas (attribute='move') o
+    las aristas que quitaron (attribute='edge'). En el segundo caso una accion
+    es tabu si vuelve a agregar alguna de esas aristas.
+    """
+
+    def __init__(self, tenure: int = 20, attribute: str = 'move',
+                 two_level: bool = False, **kwargs) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        tenure: int
+            cantidad de iteraciones que un movimiento o arista permanece tabu
+        attribute: str
+            'move' o 'edge', lo que se guarda en la lista tabu
+        two_level: bool
+            si es True los tours se representan con TwoLevelTour
+        kwargs:
+            time_limit, max_evals y on_improvement, ver LocalSearch
+        """
+        super().__init__(two_level, **kwargs)
+        if attribute not in ('move', 'edge'):
+            raise ValueError("attribute debe ser 'move' o 'edge'")
+        self.tenure = tenure
+        self.attribute = attribute
+
     def solve(self, problem, max_stops=5500):
+        self._begin(problem)
         stops = 0
-        actual = problem.init
-        mejor_estado = actual
+        actual = self.new_tour(problem.init)
+        mejor_estado = actual.copy()
         mejor_valor = problem.obj_val(actual)
-        tabu = []
-        tabu_len = 20
-        start = time()
+        self._improved(mejor_valor)
+        tabu = TabuList(self.tenure)
+
+        while stops <= max_stops and not self._exhausted():
+            # Predicado tabu para el estado actual
+            if self.attribute == 'move':
+                def is_tabu(a):
+                    return a in tabu
+            else:
+                def is_tabu(a):
+                    return any(e in tabu for e in problem.attributes(actual, a)[1])
 
-        while stops <= max_stops:
-            # Generar acciones posibles y filtrar las que están en la lista tabú
-            candidatos = []
-            for a in problem.actions(actual):
-                if a not in tabu:
-                    candidatos.append(a)
+            # Buscar la mejor acción admisible sin generar los sucesores
+            accion, valor_sucesor = problem.max_action_tabu(
+                actual, is_tabu, mejor_valor)
 
             # Si no hay candidatos posibles, terminamos
-            if not candidatos:
+            if accion is None:
                 break
 
-            # Buscar la mejor acción entre las candidatas
-            maximo_valor = float('-inf')
-            mejor_accion = None
-            for a in candidatos:
-                next_estado = problem.result(actual, a)
-                val = problem.obj_val(next_estado)
-                if val > maximo_valor:
-                    maximo_valor = val
-                    mejor_accion = a
+            # Actualizar la lista tabu, los elementos vencidos salen solos
+            if self.attribute == 'move':
+                tabu.add(accion)
+            else:
+                tabu.add(*problem.attributes(actual, accion)[0])
 
-            accion = mejor_accion
-            valor_sucesor = maximo_valor
-            next_estado = problem.result(actual, accion)
+            # Movernos al sucesor, modificando el tour en el lugar
+            problem.apply(actual, accion)
 
             self.niters += 1
 
             if valor_sucesor > mejor_valor:
                 mejor_valor = valor_sucesor
-                mejor_estado = next_estado
+                mejor_estado = actual.copy()
                 stops = 0
+                self._improved(mejor_valor)
             else:
                 stops += 1
 
-            tabu.append(accion)
-            if len(tabu) > tabu_len:
-                tabu.pop(0)
+        self._finish(mejor_estado.tolist(), mejor_valor)
+
+
+class LinKernighan(LocalSearch):
+    """Busqueda de profundidad variable al estilo Lin-Kernighan.
+
+    Cada movimiento es una secuencia de movimientos 2-opt encadenados: se fija
+    una ciudad t1 y se quita la arista (t1,t2). En cada nivel se agrega una
+    arista (t2,t3), con t3 candidato de t2, y se quita (t3,t4), de modo que
+    al cerrar con (t4,t1) se obtiene un tour. La secuencia sigue desde t4
+    mientras la ganancia parcial (aristas quitadas menos agregadas, sin la de
+    cierre) sea positiva, y se aplica el mejor cierre encontrado.
+
+    En el nivel d se prueban a lo sumo breadth[d] opciones (1 a partir del
+    ultimo nivel indicado) y la profundidad no supera max_depth. Una arista
+    agregada no se vuelve a quitar ni una quitada se vuelve a agregar.
+    Como en FirstImprovement, se usan don't-look bits sobre t1.
+    """
+
+    def __init__(self, breadth: tuple[int, ...] = (5, 3, 1), max_depth: int = 50,
+                 two_level: bool = False, **kwargs) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        breadth: tuple[int, ...]
+            cantidad de opciones a probar en cada nivel
+        max_depth: int
+            cantidad maxima de movimientos 2-opt encadenados
+        two_level: bool
+            si es True los tours se representan con TwoLevelTour
+        kwargs:
+            time_limit, max_evals y on_improvement, ver LocalSearch
+        """
+        super().__init__(two_level, **kwargs)
+        self.breadth = breadth
+        self.max_depth = max_depth
+
+    def solve(self, problem: TSP):
+        """Resuelve un TSP con Lin-Kernighan.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un TSP
+        """
+        self._begin(problem)
+
+        actual = self.new_tour(problem.init)
+        value = problem.obj_val(actual)
+        self._improved(value)
+
+        cola = deque(problem.init[:-1])
+        activa = [True] * problem.n
+
+        while cola and not self._exhausted():
+            t1 = cola.popleft()
+            activa[t1] = False
+
+            for t2 in (actual.next(t1), actual.prev(t1)):
+                movs = []
+                mejora = self._improve(problem, actual, t1, t2, problem.dist[t1, t2],
+                                       0, 0, movs, set(), {self._edge(t1, t2)})
+                if mejora > 0:
+                    value += mejora.item()
+                    self.niters += 1
+                    self._improved(value)
+                    # Reactivar los extremos de las aristas tocadas
+                    for c in {c for mov in movs for c in mov}:
+                        if not activa[c]:
+                            activa[c] = True
+                            cola.append(c)
+                    break
+
+        self._finish(actual.tolist(), value)
+
+    def _improve(self, problem: TSP, tour: Tour | TwoLevelTour, t1: int, t2: int,
+                 gain: float, best: float, depth: int, movs: list[tuple[int, int, int, int]],
+                 added: set[tuple[int, int]], removed: set[tuple[int, int]]) -> float:
+        """Extiende la secuencia de movimientos desde la arista de cierre (t1,t2).
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un TSP
+        tour: Tour | TwoLevelTour
+            tour actual, que contiene a la arista (t1,t2)
+        t1, t2: int
+            extremos de la arista de cierre, que se quitara en este nivel
+        gain: float
+            ganancia parcial de la secuencia, incluyendo quitar (t1,t2)
+        best: float
+            solo interesan cierres con mejora mayor a best
+        depth: int
+            nivel actual
+        movs: list[tuple[int, int, int, int]]
+            movimientos aplicados en la secuencia, se extiende en el lugar
+        added, removed: set[tuple[int, int]]
+            aristas agregadas y quitadas en la secuencia
+
+        Retorno:
+        =======
+        mejora: float
+            mejora del mejor cierre, si supera a best, dejando el tour en ese
+            estado; o 0, dejando el tour como estaba
+        """
+        if depth >= self.max_depth:
+            return 0
+        dist = problem.dist
+        sucesor = tour.next(t1) == t2
+
+        # Opciones (t3,t4) con ganancia parcial positiva, de mayor a menor
+        opciones = []
+        for t3 in problem.neighbors()[t2]:
+            g1 = gain - dist[t2, t3]
+            if g1 <= 0:
+                break  # los candidatos estan ordenados por distancia
+            if t3 == t1 or self._edge(t2, t3) in removed:
+                continue
+            t4 = tour.prev(t3) if sucesor else tour.next(t3)
+            if t4 == t2 or self._edge(t3, t4) in added:
+                continue
+            opciones.append((g1 + dist[t3, t4], int(t3), t4))
+        opciones.sort(reverse=True)
+
+        ancho = self.breadth[min(depth, len(self.breadth) - 1)]
+        for g2, t3, t4 in opciones[:ancho]:
+            # (t1,t2),(t4,t3) -> (t2,t3),(t1,t4)
+            tour.move(t1, t2, t4, t3)
+            movs.append((t1, t2, t4, t3))
+            added.add(self._edge(t2, t3))
+            removed.add(self._edge(t3, t4))
+
+            cierre = g2 - dist[t4, t1]
+            problem.nevals += 1
+            mejora = self._improve(problem, tour, t1, t4, g2, max(best, cierre),
+                                   depth + 1, movs, added, removed)
+            if mejora > 0:
+                return mejora
+            if cierre > best:
+                return cierre
+
+            # Deshacer: (t1,t4),(t2,t3) -> (t1,t2),(t4,t3)
+            tour.move(t1, t4, t2, t3)
+            movs.pop()
+            added.discard(self._edge(t2, t3))
+            removed.discard(self._edge(t3, t4))
+        return 0
+
+    @staticmethod
+    def _edge(u: int, v: int) -> tuple[int, int]:
+        """Arista (u,v) como par ordenado."""
+        return (u, v) if u < v else (v, u)
+
+
+class IteratedLocalSearch(LocalSearch):
+    """Busqueda local iterada con perturbaciones double-bridge.
+
+    Se parte de un optimo local (ver FirstImprovement) y en cada iteracion se
+    aplica una perturbacion double-bridge: con el tour dividido en A B C D se
+    pasa a A C B D. Ningun movimiento 2-opt la deshace de una vez, pero si B o
+    C es corto (hasta 3 ciudades con 'oropt', hasta max_segment con '3opt') un
+    solo movimiento de segmento puede volver al tour anterior, y entonces la
+    iteracion no cambia nada. Luego se vuelve a optimizar con don't-look
+    bits, pero activando solo las ciudades de las aristas tocadas, por lo que
+    cada iteracion cuesta en proporcion al cambio y no al tamaño del tour.
+
+    Si el resultado no es peor que el tour actual se acepta. Si no, se
+    deshacen los movimientos aplicados, en orden inverso.
+
+    Las familias de acciones de la optimizacion son las del TSP, por ejemplo
+    TSP(..., neighborhoods=('2opt', 'oropt')) para 2-opt y or-opt.
+    """
+
+    def __init__(self, n_kicks: int = 1000, max_kick: int = 50,
+                 two_level: bool = False, seed: int | None = None, **kwargs) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        n_kicks: int
+            cantidad de perturbaciones
+        max_kick: int
+            largo maximo de los tramos B y C de la perturbacion, asi se
+            perturba una zona del tour y no puntos arbitrariamente lejanos
+        two_level: bool
+            si es True los tours se representan con TwoLevelTour
+        seed: int | None
+            semilla de las perturbaciones
+        kwargs:
+            time_limit, max_evals y on_improvement, ver LocalSearch
+        """
+        super().__init__(two_level, **kwargs)
+        self.n_kicks = n_kicks
+        self.max_kick = max_kick
+        self.seed = seed
+
+    def solve(self, problem: TSP):
+        """Resuelve un TSP con busqueda local iterada.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un TSP
+        """
+        self._begin(problem)
+        rng = Random(self.seed)
+        n = problem.n
+
+        actual = self.new_tour(problem.init)
+        activa = [True] * n
+        inicial = problem.obj_val(problem.init)
+        self._improved(inicial)
+
+        def on_move(mejora):
+            self._improved(inicial + mejora)
+
+        mejora, _ = _descend(problem, actual, deque(problem.init[:-1]), activa,
+                             stop=self._exhausted, on_move=on_move)
+        value = inicial + mejora
+
+        if n >= 8:
+            for _ in range(self.n_kicks):
+                if self._exhausted():
+                    break
+                # Perturbacion: mover el tramo B = (i+1..j) detras de C = (j+1..k)
+                largo = min(self.max_kick, (n - 2) // 2)
+                i = rng.randrange(n)
+                j = (i + rng.randint(1, largo)) % n
+                k = (j + rng.randint(1, largo)) % n
+                kick = (i, j, k, False)
+
+                journal = problem.moves(actual, kick)
+                tocadas = {c for arista in problem.attributes(actual, kick)[0] for c in arista}
+                delta = problem.delta(actual, kick)
+                for mov in journal:
+                    actual.move(*mov)
+
+                # Reoptimizar solo alrededor de las ciudades tocadas
+                for c in tocadas:
+                    activa[c] = True
+                mejora, _ = _descend(problem, actual, deque(tocadas), activa, journal)
+                self.niters += 1
+
+                if delta + mejora >= 0:
+                    value += delta + mejora
+                    if delta + mejora > 0:
+                        self._improved(value)
+                else:
+                    for a, b, c, d in reversed(journal):
+                        actual.move(a, c, b, d)
+
+        self._finish(actual.tolist(), value)
+
+
+class SimulatedAnnealing(LocalSearch):
+    """Recocido simulado con movimientos aleatorios 2-opt y or-opt.
+
+    En cada paso se elige un movimiento al azar que une una ciudad con uno de
+    sus candidatos: un 2-opt o, si el TSP tiene la familia 'oropt', mover un
+    segmento de 1 a 3 ciudades junto al candidato. Su variacion se calcula
+    en O(1) con TSP.delta(). Si mejora se aplica; si empeora en delta < 0,
+    se aplica con probabilidad exp(delta / T).
+
+    La temperatura T baja geometricamente (T *= alpha) cada epoch pasos.
+    Cuando baja de t_min * t0 se recalienta a reheat * t0, hasta
+    max_reheats veces; despues se termina.
+
+    Los numeros aleatorios se generan con NumPy en bloques (ver _block()), no
+    de a uno por paso. El mejor valor se actualiza en cada paso aceptado,
+    pero el tour no se copia en ese momento: se anotan los movimientos
+    aplicados desde entonces, y si llegan a epoch (o al terminar) se deshacen
+    para copiar el mejor tour y se vuelven a aplicar. Si antes aparece un
+    tour mejor, la anotacion se descarta sin deshacer nada.
+    """
+
+    def __init__(self, t0: float | None = None, alpha: float = 0.95, epoch: int | None = None,
+                 t_min: float = 1e-3, reheat: float = 0.3, max_reheats: int = 3,
+                 two_level: bool = False, seed: int | None = None, **kwargs) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        t0: float | None
+            temperatura inicial, por defecto se estima para que al principio
+            se acepte la mitad de los movimientos que empeoran
+        alpha: float
+            factor de enfriamiento por epoch
+        epoch: int | None
+            pasos por temperatura, por defecto 2*n
+        t_min: float
+            temperatura final, relativa a t0
+        reheat: float
+            temperatura de recalentamiento, relativa a t0
+        max_reheats: int
+            cantidad de recalentamientos
+        two_level: bool
+            si es True los tours se representan con TwoLevelTour
+        seed: int | None
+            semilla del generador de NumPy
+        kwargs:
+            time_limit, max_evals y on_improvement, ver LocalSearch
+        """
+        super().__init__(two_level, **kwargs)
+        self.t0 = t0
+        self.alpha = alpha
+        self.epoch = epoch
+        self.t_min = t_min
+        self.reheat = reheat
+        self.max_reheats = max_reheats
+        self.seed = seed
+
+    def solve(self, problem: TSP):
+        """Resuelve un TSP con recocido simulado.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un TSP
+        """
+        self._begin(problem)
+        rng = np.random.default_rng(self.seed)
+        n = problem.n
+
+        actual = self.new_tour(problem.init)
+        value = problem.obj_val(actual)
+        mejor_tour, mejor_valor = actual.tolist(), value
+        self._improved(value)
+        if n < 5:
+            self._finish(mejor_tour, mejor_valor)
+            return
+
+        epoch = self.epoch if self.epoch is not None else 2 * n
+        t0 = self.t0 if self.t0 is not None else self._initial_temperature(problem, actual, rng)
+        temp = t0
+        reheats = 0
+        bloque = iter(())
+        agotado = False
+        journal = None  # movimientos desde el mejor tour, si aun no se copio
+
+        while not agotado:
+            for _ in range(epoch):
+                try:
+                    u, r, lado, largo, log_u = next(bloque)
+                except StopIteration:
+                    # Los limites se controlan una vez por bloque
+                    if self._exhausted():
+                        agotado = True
+                        break
+                    bloque = self._block(problem, rng)
+                    u, r, lado, largo, log_u = next(bloque)
+
+                accion = self._random_action(problem, actual, u, r, lado, largo)
+                if accion is None:
+                    continue
+                delta = problem.delta(actual, accion)
+
+                # Aceptar si mejora, o con probabilidad exp(delta / T)
+                if delta >= 0 or delta > temp * log_u:
+                    for mov in problem.moves(actual, accion):
+                        actual.move(*mov)
+                        if journal is not None:
+                            journal.append(mov)
+                    value += delta
+                    self.niters += 1
+                    if value > mejor_valor:
+                        mejor_valor = value
+                        journal = []
+                        self._improved(value)
+                    elif journal is not None and len(journal) >= epoch:
+                        mejor_tour = self._copy_best(actual, journal, redo=True)
+                        journal = None
+
+            temp *= self.alpha
+            if temp < self.t_min * t0:
+                if reheats == self.max_reheats:
+                    break
+                reheats += 1
+                temp = self.reheat * t0
+
+        if journal is not None:
+            mejor_tour = self._copy_best(actual, journal, redo=False)
+        self._finish(mejor_tour, mejor_valor)
+
+    @staticmethod
+    def _copy_best(actual: Tour | TwoLevelTour, journal: list[tuple[int, int, int, int]],
+                   redo: bool) -> list[int]:
+        """Copia el mejor tour deshaciendo los movimientos del journal.
+
+        Si redo es True los movimientos se vuelven a aplicar, y actual queda
+        como estaba.
+        """
+        for a, b, c, d in reversed(journal):
+            actual.move(a, c, b, d)
+        mejor_tour = actual.tolist()
+        if redo:
+            for mov in journal:
+                actual.move(*mov)
+        return mejor_tour
+
+    def _block(self, problem: TSP, rng: np.random.Generator, size: int = 4096):
+        """Genera de una vez los numeros aleatorios de size pasos.
+
+        Cada paso es (ciudad, indice de candidato, lado o familia, largo de
+        segmento, log de un uniforme para aceptar).
+        """
+        k = problem.neighbors().shape[1]
+        return zip(rng.integers(problem.n, size=size).tolist(),
+                   rng.integers(k, size=size).tolist(),
+                   rng.integers(4, size=size).tolist(),
+                   rng.integers(1, 4, size=size).tolist(),
+                   np.log(rng.random(size) + 1e-300).tolist())
+
+    def _random_action(self, problem: TSP, actual: Tour | TwoLevelTour, u: int, r: int,
+                       lado: int, largo: int) -> tuple | None:
+        """Construye el movimiento aleatorio que une la ciudad u con su candidato r-esimo.
+
+        Con lado 0 o 1 (o si no hay or-opt) es un 2-opt que quita la arista
+        de u con su sucesor o su predecesor. Con lado 2 o 3 se mueve el
+        segmento de largo ciudades que empieza en u, dejandolo unido a v
+        por u. Retorna None si el movimiento no es valido.
+        """
+        n = problem.n
+        v = int(problem.neighbors()[u, r])
+        pos = actual.pos
+        pu, pv = int(pos[u]), int(pos[v])
+        if lado < 2 or 'oropt' not in problem.neighborhoods:
+            if lado & 1:
+                pu, pv = (pu - 1) % n, (pv - 1) % n
+            i, j = min(pu, pv), max(pu, pv)
+            if j < i + 2 or (i == 0 and j == n - 1):
+                return None
+            return (i, j)
+        i = (pu - 1) % n
+        j = (i + largo) % n
+        k = pv if lado == 2 else (pv - 1) % n  # v antes o despues del segmento
+        if (k - i) % n <= largo:
+            return None
+        return (i, j, k, largo > 1 and lado == 3)
+
+    def _initial_temperature(self, problem: TSP, actual: Tour | TwoLevelTour,
+                             rng: np.random.Generator, p0: float = 0.5) -> float:
+        """Estima la temperatura a la que un empeoramiento se acepta con probabilidad p0."""
+        peores = []
+        for u, r, lado, largo, _ in self._block(problem, rng, 500):
+            accion = self._random_action(problem, actual, u, r, lado, largo)
+            if accion is not None:
+                delta = problem.delta(actual, accion)
+                if delta < 0:
+                    peores.append(-delta)
+        if not peores:
+            return 1.0
+        return float(np.mean(peores)) / np.log(1 / p0)
+
+
+class HeldKarp(LocalSearch):
+    """Algoritmo exacto de Held-Karp (programacion dinamica sobre subconjuntos).
+
+    C[S, j] es la longitud del camino mas corto que sale de la ciudad 0,
+    visita exactamente las ciudades del subconjunto S y termina en j, que
+    esta en S. Las ciudades 1..n-1 se numeran como bits 0..n-2 y S es una
+    mascara de bits, de modo que C es un arreglo de NumPy de 2^(n-1) x (n-1):
+
+        C[{j}, j] = dist[0, j]
+        C[S, j] = min_{i en S - {j}} C[S - {j}, i] + dist[i, j]
+
+    Los subconjuntos se procesan por cardinalidad y todos los de una misma
+    cardinalidad que contienen a j se calculan a la vez, con NumPy. El tour
+    optimo se reconstruye con los predecesores guardados.
+
+    Usa O(2^n n) memoria y O(2^n n^2) tiempo, por lo que solo resuelve
+    instancias de hasta max_cities ciudades. Con instancias mas grandes, o
+    si se agota time_limit o max_evals, no hay resultado (self.tour queda
+    vacio y self.value en None).
+    """
+
+    def __init__(self, max_cities: int = 20, **kwargs) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        max_cities: int
+            cantidad maxima de ciudades, con 20 la tabla ocupa unos 80 MB
+        kwargs:
+            time_limit, max_evals y on_improvement, ver LocalSearch
+        """
+        super().__init__(**kwargs)
+        self.max_cities = max_cities
+
+    def solve(self, problem: TSP):
+        """Resuelve un TSP de forma exacta.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un TSP con a lo sumo max_cities ciudades
+        """
+        self._begin(problem)
+        n = problem.n
+        if n > self.max_cities:
+            self._finish([], None)
+            return
+        if n <= 3:
+            state = list(range(n)) + [0]
+            value = problem.obj_val(state)
+            self._improved(value)
+            self._finish(state, value)
+            return
+
+        I, J = np.indices((n, n))
+        dist = np.asarray(problem.dist[I, J], dtype=float)
+        m = n - 1
+        D = dist[1:, 1:]
+        full = (1 << m) - 1
+
+        # Cardinalidad de cada subconjunto
+        masks = np.arange(1 << m)
+        card = np.zeros(1 << m, dtype=np.int8)
+        for b in range(m):
+            card += (masks >> b) & 1
+
+        C = np.full((1 << m, m), np.inf)
+        parent = np.full((1 << m, m), -1, dtype=np.int8)
+        C[1 << np.arange(m), np.arange(m)] = dist[0, 1:]
+
+        for k in range(2, m + 1):
+            if self._exhausted():
+                self._finish([], None)
+                return
+            S = np.flatnonzero(card == k)
+            for j in range(m):
+                sel = S[(S >> j) & 1 == 1]
+                prev = sel ^ (1 << j)
+                # C[prev, i] es inf si i no esta en prev
+                costos = C[prev] + D[:, j]
+                i = np.argmin(costos, axis=1)
+                C[sel, j] = costos[np.arange(len(sel)), i]
+                parent[sel, j] = i
+                problem.nevals += costos.size
+            self.niters += 1
+
+        # Cerrar el ciclo y reconstruir el tour desde el final
+        costos = C[full] + dist[1:, 0]
+        j = int(np.argmin(costos))
+        order = []
+        S = full
+        while j >= 0:
+            order.append(j + 1)
+            S, j = S ^ (1 << j), int(parent[S, j])
+        state = [0] + order[::-1] + [0]
+        value = problem.obj_val(state)
+        self._improved(value)
+        self._finish(state, value)
+
+
+class BranchAndBound(LocalSearch):
+    """Algoritmo exacto de ramificacion y acotacion con cotas de 1-tree.
+
+    Cada nodo del arbol de busqueda fija aristas que el tour debe usar
+    (incluidas) o no (excluidas), y su cota es la de Held-Karp con esas
+    restricciones (ver bound.py): las excluidas tienen distancia infinita y
+    las incluidas se abaratan para que el 1-tree las tome. Las penalidades
+    de cada nodo parten de las de su padre.
+
+    * El tour inicial (incumbente) lo da una heuristica, por defecto
+    IteratedLocalSearch, y se reemplaza cuando el 1-tree de un nodo es un
+    tour mas corto. La heuristica se ejecuta con lo que queda de time_limit
+    y max_evals (o con sus propios limites, si son menores), de modo que
+    siempre hay un incumbente antes de agotar el presupuesto.
+
+    * En la raiz se excluyen para siempre las aristas cuyo costo reducido
+    muestra que ningun tour que las use puede mejorar al incumbente.
+
+    * Los nodos se exploran primero el de menor cota (best-first), con un
+    heap. Se ramifica sobre las aristas libres del 1-tree en la ciudad de
+    mayor grado, ver _branch().
+
+    * Con workers > 1 se expanden varios nodos a la vez y las cotas de sus
+    hijos se calculan en un pool de procesos.
+
+    Al terminar, self.bound es la menor cota de los nodos sin explorar (la
+    longitud optima si se exploraron todos) y self.gap la distancia del
+    tour a ella, asi un corte por time_limit deja una garantia.
+    """
+
+    def __init__(self, heuristic: LocalSearch | None = None, workers: int = 1,
+                 node_iters: int = 30, **kwargs) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        heuristic: LocalSearch | None
+            algoritmo que da el tour inicial (HillClimbingReset, Tabu, ...)
+            por defecto IteratedLocalSearch(seed=0)
+        workers: int
+            cantidad de procesos para calcular las cotas de los hijos, con 1
+            se calculan en este proceso y con None se usan todos los nucleos
+        node_iters: int
+            iteraciones del subgradiente en cada nodo (en la raiz son mas)
+        kwargs:
+            time_limit, max_evals, on_improvement y target_gap, ver LocalSearch
+        """
+        super().__init__(**kwargs)
+        self.heuristic = heuristic
+        self.workers = workers
+        self.node_iters = node_iters
+
+    def solve(self, problem: TSP):
+        """Resuelve un TSP de forma exacta.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un TSP con matriz de distancias
+        """
+        self._begin(problem)
+        n = problem.n
+        mejor_tour, mejor_valor = self._heuristic_tour(problem)
+        self._improved(mejor_valor)
+        if n <= 3:
+            self.bound = -mejor_valor
+            self._finish(mejor_tour, mejor_valor)
+            return
+        if self._exhausted():
+            self._finish(mejor_tour, mejor_valor)
+            return
+
+        I, J = np.indices((n, n))
+        dist = problem.dist[I, J]
+        integer = np.issubdtype(dist.dtype, np.integer)
+        D = dist.astype(float)
+        np.fill_diagonal(D, np.inf)
+
+        # Raiz: cota, penalidades y fijacion de aristas por costo reducido
+        upper = -mejor_valor
+        raiz = _node_bound(D, upper, (), (), None, 1000, integer, self._exhausted)
+        self.niters = 1
+        problem.nevals += raiz[4]
+        if raiz[0] < upper and not self._exhausted():
+            _fix_edges(D, raiz[1], raiz[2], upper, integer)
+            raiz = _node_bound(D, upper, (), (), raiz[1], self.node_iters, integer,
+                               self._exhausted)
+            problem.nevals += raiz[4]
+
+        heap = []
+        contador = 0
+        mejor_tour, mejor_valor = self._accept(raiz, mejor_tour, mejor_valor)
+        if raiz[0] < -mejor_valor:
+            heap.append((raiz[0], contador, (), (), raiz[1], raiz[2]))
+
+        pool = shared = None
+        lote = 1  # nodos que se expanden a la vez
+        if self.workers != 1:
+            # Los procesos leen D, ya con las aristas excluidas, de memoria compartida
+            lote = 2 * (self.workers or os.cpu_count() or 1)
+            shared = SharedTSP(TSP.from_matrix(D))
+            pool = ProcessPoolExecutor(self.workers, initializer=_init_bnb_worker,
+                                       initargs=(shared.spec, integer))
+        try:
+            while heap and not self._exhausted():
+                # Tomar los mejores nodos que todavia pueden mejorar
+                nodos = []
+                while heap and len(nodos) < lote:
+                    nodo = heapq.heappop(heap)
+                    if nodo[0] < -mejor_valor:
+                        nodos.append(nodo)
+                if not nodos:
+                    break
+
+                hijos = []
+                for _, _, incluidas, excluidas, pi, edges in nodos:
+                    for inc, exc in _branch(D, edges, incluidas, excluidas):
+                        hijos.append((inc, exc, pi))
+                args = [(-mejor_valor, inc, exc, pi, self.node_iters) for inc, exc, pi in hijos]
+                if pool is None:
+                    cotas = [_node_bound(D, *a, integer) for a in args]
+                else:
+                    cotas = list(pool.map(_node_bound_worker, args))
+                self.niters += len(nodos)
+
+                for (incluidas, excluidas, _), cota in zip(hijos, cotas):
+                    problem.nevals += cota[4]
+                    mejor_tour, mejor_valor = self._accept(cota, mejor_tour, mejor_valor)
+                    if cota[0] < -mejor_valor and not cota[3]:
+                        contador += 1
+                        heapq.heappush(heap, (cota[0], contador, incluidas, excluidas,
+                                              cota[1], cota[2]))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+                shared.close()
+
+        # Cota global: la menor de los nodos abiertos, o el optimo
+        abiertas = [nodo[0] for nodo in heap if nodo[0] < -mejor_valor]
+        self.bound = min(abiertas, default=-mejor_valor)
+        self._finish(mejor_tour, mejor_valor)
+
+    def _heuristic_tour(self, problem: TSP) -> tuple[list[int], float]:
+        """Calcula el incumbente inicial con la heuristica, dentro del presupuesto."""
+        heuristic = self.heuristic or IteratedLocalSearch(seed=0)
+        limites = heuristic.time_limit, heuristic.max_evals
+        seconds, evals = self._remaining()
+        if seconds is not None:
+            heuristic.time_limit = seconds if limites[0] is None else min(seconds, limites[0])
+        if evals is not None:
+            heuristic.max_evals = evals if limites[1] is None else min(evals, limites[1])
+        try:
+            heuristic.solve(problem)
+        finally:
+            heuristic.time_limit, heuristic.max_evals = limites
+        return heuristic.tour, heuristic.value
+
+    def _accept(self, cota: tuple, mejor_tour: list[int],
+                mejor_valor: float) -> tuple[list[int], float]:
+        """Actualiza el incumbente si el 1-tree de un nodo es un tour mas corto."""
+        if cota[3] and -cota[5] > mejor_valor:
+            mejor_tour = _tree_tour(cota[2])
+            mejor_valor = self._problem.obj_val(mejor_tour)
+            self._improved(mejor_valor)
+        return mejor_tour, mejor_valor
+
+
+def _node_bound(D: np.ndarray, upper: float, incluidas: tuple, excluidas: tuple,
+                pi: np.ndarray | None, iters: int, integer: bool,
+                stop: Callable[[int], bool] | None = None) -> tuple:
+    """Calcula la cota de un nodo de BranchAndBound.
+
+    Argumentos:
+    ==========
+    D: np.ndarray
+        matriz de distancias como float, con inf en las aristas prohibidas
+    upper: float
+        longitud del incumbente
+    incluidas, excluidas: tuple
+        aristas (u, v) fijadas por el nodo
+    pi: np.ndarray | None
+        penalidades iniciales
+    iters: int
+        iteraciones del subgradiente
+    integer: bool
+        si las distancias son enteras
+    stop: Callable[[int], bool] | None
+        funcion que recibe la cantidad de 1-trees calculados y corta el
+        subgradiente si retorna True
+
+    Retorno:
+    =======
+    (bound, pi, edges, is_tour, trees, length): tuple
+        cota (inf si el nodo no tiene tours), penalidades, aristas del
+        1-tree, si ese 1-tree es un tour, cantidad de 1-trees calculados y
+        longitud real del 1-tree
+    """
+    n = len(D)
+    infactible = (np.inf, pi, None, False, 0, np.inf)
+
+    # Propagar: una ciudad con dos aristas incluidas no usa ninguna otra
+    grado = np.zeros(n, dtype=np.int64)
+    for u, v in incluidas:
+        grado[u] += 1
+        grado[v] += 1
+    if (grado > 2).any() or _has_subtour(n, incluidas):
+        return infactible
+    W = D.copy()
+    for u, v in excluidas:
+        W[u, v] = W[v, u] = np.inf
+    for c in np.flatnonzero(grado == 2):
+        W[c, :] = W[:, c] = np.inf
+    for u, v in incluidas:
+        W[u, v] = W[v, u] = D[u, v]
+
+    # Las incluidas se abaratan en M para que el 1-tree las tome
+    finitas = D[np.isfinite(D)]
+    M = 2 * n * (finitas.max() if len(finitas) else 1.0) + 1
+    for u, v in incluidas:
+        W[u, v] = W[v, u] = D[u, v] - M
+    m = M * len(incluidas)
+
+    def tree(p):
+        cost, deg, edges = one_tree(lambda u: W[u], n, p)
+        return cost + m, deg, edges
+
+    if pi is None:
+        pi = np.zeros(n)
+    if not np.isfinite(tree(pi)[0]):
+        return infactible
+    bound, pi, edges, trees = _subgradient_count(tree, n, upper, pi, iters, integer, stop)
+    es_tour = bool((np.bincount(edges.ravel(), minlength=n) == 2).all())
+    length = float(D[edges[:, 0], edges[:, 1]].sum())
+    if es_tour:
+        bound = length
+    return bound, pi, edges, es_tour, trees, length
+
+
+def _subgradient_count(tree, n: int, upper: float, pi: np.ndarray, iters: int,
+                       integer: bool, stop: Callable[[int], bool] | None = None) -> tuple:
+    """Llama a bound.subgradient() contando los 1-trees calculados."""
+    contador = [0]
+
+    def contado(p):
+        contador[0] += 1
+        return tree(p)
+
+    def parar():
+        return stop(contador[0])
+    bound, pi, edges = subgradient(contado, n, upper, pi, iters,
+                                   patience=max(5, iters // 5), integer=integer,
+                                   stop=parar if stop is not None else None)
+    return bound, pi, edges, contador[0]
+
+
+def _fix_edges(D: np.ndarray, pi: np.ndarray, edges: np.ndarray, upper: float,
+               integer: bool) -> None:
+    """Excluye las aristas que no pueden estar en un tour mas corto que upper.
+
+    Agregar una arista (u,v) fuera del 1-tree obliga a quitar la mas larga
+    del camino entre u y v en el arbol (o la mas larga de la ciudad 0), lo
+    que da una cota de los tours que la usan. Modifica D en el lugar.
+    """
+    n = len(D)
+    W = D + pi[:, None] + pi[None, :]
+    cost = W[edges[:, 0], edges[:, 1]].sum()
+    w = cost - 2 * pi.sum()
+
+    # Mayor arista del camino en el arbol de las ciudades 1..n-1
+    adj = [[] for _ in range(n)]
+    ceros = []
+    for u, v in edges.tolist():
+        if u == 0 or v == 0:
+            ceros.append(W[u, v])
+        else:
+            adj[u].append(v)
+            adj[v].append(u)
+    mayor = np.zeros((n, n))
+    for s in range(1, n):
+        pila = [(s, -1, 0.0)]
+        while pila:
+            c, padre, m = pila.pop()
+            mayor[s, c] = m
+            for x in adj[c]:
+                if x != padre:
+                    pila.append((x, c, max(m, W[c, x])))
+    mayor[0, :] = mayor[:, 0] = max(ceros)
+
+    cota = w + W - mayor
+    if integer:
+        cota = np.ceil(cota - 1e-6)
+    fuera = cota >= upper
+    fuera[edges[:, 0], edges[:, 1]] = False
+    fuera[edges[:, 1], edges[:, 0]] = False
+    D[fuera] = np.inf
+
+
+def _has_subtour(n: int, incluidas: tuple) -> bool:
+    """Determina si las aristas incluidas cierran un ciclo que no es un tour."""
+    parent = list(range(n))
+    for u, v in incluidas:
+        ru, rv = find(parent, u), find(parent, v)
+        if ru == rv:
+            return len(incluidas) < n
+        parent[ru] = rv
+    return False
+
+
+def _branch(D: np.ndarray, edges: np.ndarray, incluidas: tuple,
+            excluidas: tuple) -> list[tuple[tuple, tuple]]:
+    """Genera los hijos de un nodo, con la ramificacion de Volgenant y Jonker.
+
+    Se elige la ciudad c de mayor grado en el 1-tree y sus dos aristas libres
+    e1, e2 mas largas. Los hijos son: sin e1; con e1 y sin e2; con e1 y e2
+    (y entonces sin ninguna otra arista de c). Si c ya tiene una arista
+    incluida, alcanza con sin e1 y con e1.
+    """
+    n = len(D)
+    deg = np.bincount(edges.ravel(), minlength=n)
+    fijas = set(incluidas)
+    c = int(np.argmax(deg))
+    libres = []
+    ya_incluidas = 0
+    for u, v in edges.tolist():
+        if c in (u, v):
+            e = (u, v) if u < v else (v, u)
+            if e in fijas:
+                ya_incluidas += 1
+            else:
+                libres.append(e)
+    libres.sort(key=lambda e: D[e], reverse=True)
+    e1 = libres[0]
+    if ya_incluidas == 1 or len(libres) < 2:
+        return [(incluidas, excluidas + (e1,)),
+                (incluidas + (e1,), excluidas)]
+    e2 = libres[1]
+    return [(incluidas, excluidas + (e1,)),
+            (incluidas + (e1,), excluidas + (e2,)),
+            (incluidas + (e1, e2), excluidas)]
+
+
+def _tree_tour(edges: np.ndarray) -> list[int]:
+    """Convierte un 1-tree en el que todas las ciudades tienen grado 2 en un estado."""
+    n = len(edges)
+    adj = [[] for _ in range(n)]
+    for u, v in edges.tolist():
+        adj[u].append(v)
+        adj[v].append(u)
+    state = [0]
+    prev, c = -1, 0
+    for _ in range(n - 1):
+        nxt = adj[c][0] if adj[c][0] != prev else adj[c][1]
+        prev, c = c, nxt
+        state.append(c)
+    state.append(0)
+    return state
+
+
+# Matriz de distancias de cada proceso de BranchAndBound
+_worker_dist = None
+
+
+def _init_bnb_worker(spec: dict, integer: bool) -> None:
+    """Conecta el proceso a la matriz de distancias compartida, ver BranchAndBound."""
+    global _worker_dist
+    _worker_dist = (attach(spec), integer)
 
-            actual = next_estado
 
-        end = time()
-        self.tour = mejor_estado
-        self.value = mejor_valor
-        self.time = end - start
+def _node_bound_worker(args: tuple) -> tuple:
+    """Calcula la cota de un nodo en un proceso, ver _node_bound()."""
+    problem, integer = _worker_dist
+    return _node_bound(problem.dist, *args, integer)
@@ -0,0 +1,129 @@
+"""Este modulo define la clase SharedTSP y la funcion attach.
+
+SharedTSP publica los datos de una instancia de TSP en memoria compartida
+(multiprocessing.shared_memory), para que varios procesos resuelvan la misma
+instancia sin enviar el grafo ni la matriz de distancias a cada uno.
+
+* En el proceso principal se construye SharedTSP(problem), que copia una
+unica vez la matriz de distancias, las coordenadas y las listas de
+candidatos (si ya estaban calculadas) a bloques de memoria compartida.
+Si las distancias se calculan a demanda (tsplib.CoordDistances) solo se
+comparten las coordenadas, y si la matriz se abrio del cache en disco cada
+proceso abre el mismo archivo, sin copiarla.
+
+* Lo que se envia a los procesos es solo la descripcion de esos bloques
+(SharedTSP.spec): nombres, formas, tipos y parametros del TSP. Cada proceso
+llama a attach(spec) y obtiene un TSP cuyos arreglos son vistas de la
+memoria compartida, sin copias.
+
+* Los bloques se liberan con close(), al salir de un bloque with o, en
+ultima instancia, al terminar el programa.
+"""
+
+from __future__ import annotations
+import atexit
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from problem import TSP
+from tsplib import CoordDistances
+
+# Arreglos del TSP que se comparten
+_ARRAYS = ('dist', 'coords', '_cand')
+
+
+class SharedTSP:
+    """Clase que representa una instancia de TSP publicada en memoria compartida."""
+
+    def __init__(self, problem: TSP) -> None:
+        """Copia los datos de un TSP a memoria compartida.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            instancia a publicar
+        """
+        self._blocks = []
+        arrays = {}
+        files = {}
+        try:
+            for name in _ARRAYS:
+                array = getattr(problem, name)
+                if not isinstance(array, np.ndarray):
+                    continue  # no existe o se calcula a demanda
+                if isinstance(array, np.memmap) and array.mode == 'r':
+                    files[name] = array.filename  # ya esta en el cache en disco
+                    continue
+                block = SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                view[...] = array
+                arrays[name] = (block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+        lazy = problem.dist if isinstance(problem.dist, CoordDistances) else None
+        self.spec = {'arrays': arrays,
+                     'files': files,
+                     'lazy': (lazy.kind, lazy.cache_size) if lazy is not None else None,
+                     'k': problem.k,
+                     'neighborhoods': problem.neighborhoods,
+                     'max_segment': problem.max_segment,
+                     'init': problem.init,
+                     'bound': problem._bound}
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Libera la memoria compartida. Se puede llamar mas de una vez."""
+        while self._blocks:
+            block = self._blocks.pop()
+            block.close()
+            block.unlink()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> SharedTSP:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach(spec: dict) -> TSP:
+    """Construye un TSP cuyos arreglos son vistas de la memoria compartida.
+
+    Los bloques quedan abiertos mientras viva el TSP (en el atributo _shm).
+    El TSP no tiene grafo (self.G = None).
+
+    Argumentos:
+    ==========
+    spec: dict
+        descripcion de la instancia, ver SharedTSP.spec
+
+    Retorno:
+    =======
+    problem: TSP
+        instancia sin copias de los datos
+    """
+    blocks = []
+    views = {}
+    for name, (shm_name, shape, dtype) in spec['arrays'].items():
+        block = SharedMemory(name=shm_name)
+        blocks.append(block)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        views[name] = view
+    for name, filename in spec['files'].items():
+        views[name] = np.load(filename, mmap_mode='r')
+
+    if spec['lazy'] is not None:
+        kind, cache_size = spec['lazy']
+        dist = CoordDistances(views['coords'], kind, cache_size)
+    else:
+        dist = views['dist']
+    problem = TSP.from_matrix(dist, views.get('coords'), k=spec['k'],
+                              neighborhoods=spec['neighborhoods'],
+                              max_segment=spec['max_segment'])
+    problem._cand = views.get('_cand')
+    problem.init = list(spec['init'])
+    problem._bound = spec['bound']
+    problem._shm = blocks
+    return problem
@@ -0,0 +1,57 @@
+"""Este modulo define la clase TabuList.
+
+TabuList representa la memoria de corto plazo de la busqueda tabu.
+Guarda los atributos (acciones, aristas, etc.) que se volvieron tabu en las
+ultimas iteraciones y los libera cuando se cumple su permanencia (tenure).
+
+* El orden de expiracion se lleva en una cola (deque), donde cada elemento
+es el grupo de atributos agregado en una misma iteracion.
+
+* La pertenencia se resuelve con un diccionario que cuenta cuantas veces
+esta cada atributo en la cola, por lo que consultar si algo es tabu es O(1)
+sin importar el tamaño de la lista.
+"""
+
+from __future__ import annotations
+from collections import deque
+from typing import Hashable
+
+
+class TabuList:
+    """Clase que representa una lista tabu acotada."""
+
+    def __init__(self, tenure: int = 20) -> None:
+        """Construye una lista tabu vacia.
+
+        Argumentos:
+        ==========
+        tenure: int
+            cantidad de iteraciones que un atributo permanece tabu
+        """
+        self.tenure = tenure
+        self.queue = deque()  # grupos de atributos, del mas viejo al mas nuevo
+        self.count = {}  # atributo -> cantidad de apariciones en la cola
+
+    def add(self, *items: Hashable) -> None:
+        """Agrega los atributos de una iteracion y descarta los vencidos.
+
+        Argumentos:
+        ==========
+        items: Hashable
+            atributos que se vuelven tabu en esta iteracion
+        """
+        self.queue.append(items)
+        for item in items:
+            self.count[item] = self.count.get(item, 0) + 1
+
+        # Liberar el grupo mas viejo si se supero la permanencia
+        while len(self.queue) > self.tenure:
+            for item in self.queue.popleft():
+                if self.count[item] == 1:
+                    del self.count[item]
+                else:
+                    self.count[item] -= 1
+
+    def __contains__(self, item: Hashable) -> bool:
+        """Determina si un atributo es tabu."""
+        return item in self.count
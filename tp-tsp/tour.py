@@ -0,0 +1,382 @@
+"""Este modulo define las clases Tour y TwoLevelTour.
+
+Tour representa un tour del TSP como un arreglo de ciudades, pensado para
+ser modificado en el lugar por los algoritmos de busqueda local.
+TwoLevelTour es una alternativa para instancias muy grandes, donde incluso
+invertir en el lugar un camino de O(n) ciudades es demasiado caro.
+
+* Las ciudades se guardan en un arreglo de NumPy de enteros de 32 bits
+(order), sin repetir la primera ciudad al final: el tour es ciclico y la
+posicion p es seguida por la posicion (p+1) % n.
+
+* Se mantiene el indice inverso (pos), con la posicion de cada ciudad, de
+modo que next y prev son O(1).
+
+* Un movimiento 2-opt invierte un camino del tour. Como invertir un camino
+o su complemento da el mismo ciclo, se invierte el mas corto, sin copiar
+el tour completo.
+"""
+
+from __future__ import annotations
+from bisect import bisect_right
+from typing import Sequence
+import numpy as np
+
+
+class Tour:
+    """Clase que representa un tour como un arreglo con indice inverso."""
+
+    def __init__(self, cities: Sequence[int]) -> None:
+        """Construye un tour.
+
+        Argumentos:
+        ==========
+        cities: Sequence[int]
+            ciudades en el orden del tour, enumeradas de 0 a n-1
+            puede repetir la primera ciudad al final, como los estados del TSP
+        """
+        order = np.array(cities, dtype=np.int32)
+        if len(order) > 1 and order[0] == order[-1]:
+            order = order[:-1]
+        self.n = len(order)
+        self.order = order
+        self.pos = np.empty(self.n, dtype=np.int32)
+        self.pos[order] = np.arange(self.n, dtype=np.int32)
+
+    def next(self, c: int) -> int:
+        """Ciudad que sigue a c en el tour."""
+        p = self.pos[c] + 1
+        return int(self.order[p if p < self.n else 0])
+
+    def prev(self, c: int) -> int:
+        """Ciudad que precede a c en el tour."""
+        return int(self.order[self.pos[c] - 1])
+
+    def flip(self, a: int, b: int, c: int, d: int) -> None:
+        """Reemplaza las aristas (a,b) y (c,d) por (a,c) y (b,d).
+
+        Requiere b = next(a) y d = next(c). Se invierte el camino de b a c,
+        o el de d a a si es mas corto (el ciclo resultante es el mismo).
+        """
+        i, j = self.pos[b], self.pos[c]
+        length = (j - i) % self.n + 1
+        if 2 * length > self.n:
+            i, j = self.pos[d], self.pos[a]
+            length = self.n - length
+        self._reverse(int(i), int(j), int(length))
+
+    def move(self, a: int, b: int, c: int, d: int) -> None:
+        """Reemplaza las aristas {a,b} y {c,d} por {a,c} y {b,d}.
+
+        A diferencia de flip(), no importa la orientacion del tour: alcanza con
+        que (a,b) y (c,d) se recorran en el mismo sentido.
+        """
+        if self.next(a) == b:
+            self.flip(a, b, c, d)
+        else:
+            self.flip(b, a, d, c)
+
+    def _reverse(self, i: int, j: int, length: int) -> None:
+        """Invierte el camino de largo length que va de la posicion i a la j."""
+        order, pos = self.order, self.pos
+        if i <= j:
+            seg = order[i:j + 1]
+            seg[:] = seg[::-1].copy()
+            pos[seg] = np.arange(i, j + 1, dtype=np.int32)
+        else:
+            idx = (i + np.arange(length)) % self.n
+            order[idx] = order[idx[::-1]]
+            pos[order[idx]] = idx
+
+    def copy(self) -> Tour:
+        """Retorna una copia del tour."""
+        other = Tour.__new__(Tour)
+        other.n = self.n
+        other.order = self.order.copy()
+        other.pos = self.pos.copy()
+        return other
+
+    def tolist(self) -> list[int]:
+        """Retorna el tour como estado del TSP: empieza y termina en la ciudad 0."""
+        state = np.roll(self.order, -int(self.pos[0])).tolist()
+        state.append(state[0])
+        return state
+
+    def __getitem__(self, p: int) -> int:
+        """Ciudad en la posicion p, tomada de forma ciclica."""
+        return int(self.order[p % self.n])
+
+    def __len__(self) -> int:
+        """Cantidad de ciudades del tour."""
+        return self.n
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """Permite usar el tour con np.asarray(), sin repetir la primera ciudad."""
+        return self.order if dtype is None else self.order.astype(dtype)
+
+
+class _Segment:
+    """Segmento de un TwoLevelTour: un tramo del tour con bit de inversion."""
+
+    __slots__ = ('cities', 'rev', 'rank', 'offset', 'base')
+
+    def __init__(self, cities: list[int], rev: bool, base: int) -> None:
+        self.cities = cities  # ciudades en orden interno
+        self.rev = rev  # si es True el tramo se recorre al reves
+        self.base = base  # la ciudad c esta en cities[idx_of[c] - base]
+        self.rank = 0  # posicion del segmento en la lista de segmentos
+        self.offset = 0  # posicion en el tour de la primera ciudad del tramo
+
+    def first(self) -> int:
+        """Primera ciudad del tramo en el sentido del tour."""
+        return self.cities[-1] if self.rev else self.cities[0]
+
+    def last(self) -> int:
+        """Ultima ciudad del tramo en el sentido del tour."""
+        return self.cities[0] if self.rev else self.cities[-1]
+
+
+class _Positions:
+    """Vista de las posiciones de un TwoLevelTour: pos[c] es la posicion de c."""
+
+    def __init__(self, tour: TwoLevelTour) -> None:
+        self.tour = tour
+
+    def __getitem__(self, c: int) -> int:
+        return self.tour.position(c)
+
+
+class TwoLevelTour:
+    """Clase que representa un tour como lista doblemente enlazada de dos niveles.
+
+    El tour se divide en segmentos de aproximadamente sqrt(n) ciudades, cada
+    uno con un bit de inversion. next y prev son O(1), y un movimiento 2-opt
+    cuesta O(sqrt(n)): se parten a lo sumo dos segmentos en los extremos
+    del camino y se invierte el orden (y el bit) de los segmentos intermedios,
+    sin tocar sus ciudades. Al partir un segmento, el pedazo mas chico se une
+    al segmento vecino si es posible; si igual se acumulan demasiados
+    segmentos se reconstruye la estructura.
+
+    Tiene la misma interfaz que Tour, por lo que los algoritmos pueden usar
+    cualquiera de los dos.
+    """
+
+    def __init__(self, cities: Sequence[int], size: int | None = None) -> None:
+        """Construye un tour.
+
+        Argumentos:
+        ==========
+        cities: Sequence[int]
+            ciudades en el orden del tour, enumeradas de 0 a n-1
+            puede repetir la primera ciudad al final, como los estados del TSP
+        size: int | None
+            largo de los segmentos, por defecto sqrt(n)
+        """
+        order = [int(c) for c in cities]
+        if len(order) > 1 and order[0] == order[-1]:
+            order.pop()
+        self.n = len(order)
+        self.size = size if size is not None else max(8, int(self.n ** 0.5))
+        self._build(order)
+
+    def _build(self, order: list[int]) -> None:
+        """Arma los segmentos a partir del orden de las ciudades."""
+        n, size = self.n, self.size
+        self.segs = [_Segment(order[k:k + size], False, k) for k in range(0, n, size)]
+        self.seg_of = [None] * n  # segmento de cada ciudad
+        self.idx_of = [0] * n  # indice de cada ciudad, ver _Segment.base
+        for k, c in enumerate(order):
+            self.seg_of[c] = self.segs[k // size]
+            self.idx_of[c] = k
+        self.offsets = [0] * len(self.segs)  # offset de cada segmento, para bisect
+        self._renumber(0, len(self.segs))
+
+    def _renumber(self, start: int, stop: int) -> None:
+        """Recalcula rank y offset de los segmentos entre start y stop (sin incluir)."""
+        segs, offsets = self.segs, self.offsets
+        offset = segs[start - 1].offset + len(segs[start - 1].cities) if start > 0 else 0
+        for r in range(start, stop):
+            seg = segs[r]
+            seg.rank = r
+            seg.offset = offset
+            offsets[r] = offset
+            offset += len(seg.cities)
+
+    def _insert(self, r: int, seg: _Segment) -> None:
+        """Inserta un segmento en la posicion r de la lista de segmentos."""
+        segs = self.segs
+        segs.insert(r, seg)
+        self.offsets.insert(r, 0)
+        for k in range(r + 1, len(segs)):
+            segs[k].rank = k
+
+    def next(self, c: int) -> int:
+        """Ciudad que sigue a c en el tour."""
+        seg = self.seg_of[c]
+        i = self.idx_of[c] - seg.base
+        i = i - 1 if seg.rev else i + 1
+        if 0 <= i < len(seg.cities):
+            return seg.cities[i]
+        return self.segs[(seg.rank + 1) % len(self.segs)].first()
+
+    def prev(self, c: int) -> int:
+        """Ciudad que precede a c en el tour."""
+        seg = self.seg_of[c]
+        i = self.idx_of[c] - seg.base
+        i = i + 1 if seg.rev else i - 1
+        if 0 <= i < len(seg.cities):
+            return seg.cities[i]
+        return self.segs[seg.rank - 1].last()
+
+    def position(self, c: int) -> int:
+        """Posicion de la ciudad c en el tour."""
+        seg = self.seg_of[c]
+        i = self.idx_of[c] - seg.base
+        return seg.offset + (len(seg.cities) - 1 - i if seg.rev else i)
+
+    @property
+    def pos(self) -> _Positions:
+        """Posiciones de las ciudades, como el arreglo pos de Tour."""
+        return _Positions(self)
+
+    def _split(self, c: int, keep: int | None = None) -> None:
+        """Parte el segmento de c para que c sea la primera ciudad de un segmento.
+
+        El pedazo mas chico se une al segmento vecino de ese lado si tiene el
+        mismo bit de inversion y no queda demasiado largo, salvo que eso haga
+        que keep deje de ser la primera ciudad de su segmento. Si no, pasa a
+        ser un segmento nuevo. En ambos casos solo se recorren sus ciudades.
+        """
+        seg = self.seg_of[c]
+        start = seg.first()
+        if start == c:
+            return
+        segs, cities, rev = self.segs, seg.cities, seg.rev
+        i = self.idx_of[c] - seg.base
+
+        # head: las ciudades del tramo antes de c, tail: c y las siguientes
+        if rev:
+            head, tail = cities[i + 1:], cities[:i + 1]
+        else:
+            head, tail = cities[:i], cities[i:]
+        r = seg.rank
+
+        if len(head) <= len(tail):
+            seg.cities = tail
+            if not rev:
+                seg.base += i
+            other = segs[r - 1] if r > 0 and start != keep else None
+            if (other is not None and other.rev == rev
+                    and len(other.cities) + len(head) <= 2 * self.size):
+                if rev:
+                    other.cities = head + other.cities
+                    other.base -= len(head)
+                    self._adopt(other, head, other.base)
+                else:
+                    self._adopt(other, head, other.base + len(other.cities))
+                    other.cities.extend(head)
+                self._renumber(r, r + 1)
+            else:
+                new = _Segment(head, rev, seg.base + len(tail) if rev else seg.base - i)
+                self._adopt(new, head, None)
+                self._insert(r, new)
+                self._renumber(r, r + 2)
+        else:
+            seg.cities = head
+            if rev:
+                seg.base += i + 1
+            other = segs[r + 1] if r + 1 < len(segs) else None
+            if (other is not None and other.rev == rev and other.first() != keep
+                    and len(other.cities) + len(tail) <= 2 * self.size):
+                if rev:
+                    self._adopt(other, tail, other.base + len(other.cities))
+                    other.cities.extend(tail)
+                else:
+                    other.cities = tail + other.cities
+                    other.base -= len(tail)
+                    self._adopt(other, tail, other.base)
+                self._renumber(r + 1, r + 2)
+            else:
+                new = _Segment(tail, rev, seg.base - i - 1 if rev else seg.base + len(head))
+                self._adopt(new, tail, None)
+                self._insert(r + 1, new)
+                self._renumber(r + 1, r + 2)
+
+    def _adopt(self, seg: _Segment, cities: list[int], base: int | None) -> None:
+        """Asigna ciudades a un segmento. Si base no es None se reindexan desde base."""
+        seg_of, idx_of = self.seg_of, self.idx_of
+        if base is None:
+            for c in cities:
+                seg_of[c] = seg
+        else:
+            for t, c in enumerate(cities, base):
+                seg_of[c] = seg
+                idx_of[c] = t
+
+    def flip(self, a: int, b: int, c: int, d: int) -> None:
+        """Reemplaza las aristas (a,b) y (c,d) por (a,c) y (b,d).
+
+        Requiere b = next(a) y d = next(c). Se invierte el camino de b a c, o
+        el de d a a si el primero pasa por el final de la lista de segmentos.
+        """
+        self._split(b)
+        self._split(d, keep=b)
+        rb, rd = self.seg_of[b].rank, self.seg_of[d].rank
+        if rb < rd:
+            i, j = rb, rd  # segmentos de b a c
+        else:
+            i, j = rd, rb  # segmentos de d a a
+        segs = self.segs
+        segs[i:j] = segs[i:j][::-1]
+        for seg in segs[i:j]:
+            seg.rev = not seg.rev
+        self._renumber(i, j)
+
+        # Reconstruir si los cortes acumularon demasiados segmentos
+        if len(segs) > 2 * (self.n // self.size + 1):
+            self._build(self._order())
+
+    def move(self, a: int, b: int, c: int, d: int) -> None:
+        """Reemplaza las aristas {a,b} y {c,d} por {a,c} y {b,d}.
+
+        A diferencia de flip(), no importa la orientacion del tour: alcanza con
+        que (a,b) y (c,d) se recorran en el mismo sentido.
+        """
+        if self.next(a) == b:
+            self.flip(a, b, c, d)
+        else:
+            self.flip(b, a, d, c)
+
+    def copy(self) -> TwoLevelTour:
+        """Retorna una copia del tour."""
+        return TwoLevelTour(self._order(), self.size)
+
+    def _order(self) -> list[int]:
+        """Ciudades en el orden del tour, empezando por el primer segmento."""
+        order = []
+        for seg in self.segs:
+            order.extend(reversed(seg.cities) if seg.rev else seg.cities)
+        return order
+
+    def tolist(self) -> list[int]:
+        """Retorna el tour como estado del TSP: empieza y termina en la ciudad 0."""
+        order = self._order()
+        p = self.position(0)
+        state = order[p:] + order[:p]
+        state.append(state[0])
+        return state
+
+    def __getitem__(self, p: int) -> int:
+        """Ciudad en la posicion p, tomada de forma ciclica."""
+        p %= self.n
+        seg = self.segs[bisect_right(self.offsets, p) - 1]
+        t = p - seg.offset
+        return seg.cities[len(seg.cities) - 1 - t if seg.rev else t]
+
+    def __len__(self) -> int:
+        """Cantidad de ciudades del tour."""
+        return self.n
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """Permite usar el tour con np.asarray(), sin repetir la primera ciudad."""
+        return np.array(self._order(), dtype=np.int32 if dtype is None else dtype)
@@ -0,0 +1,393 @@
+"""Este modulo se encarga de la lectura nativa de archivos ".tsp".
+
+A diferencia de load.read_tsp(), no usa tsplib95 ni construye un grafo de
+networkx: las secciones del archivo se leen directamente a arreglos de NumPy
+y las distancias se calculan de forma vectorizada.
+
+* Tipos de distancia soportados (EDGE_WEIGHT_TYPE): EUC_2D, CEIL_2D, ATT,
+GEO y EXPLICIT, con las reglas de redondeo de TSPLIB.
+
+* Formatos de matriz soportados (EDGE_WEIGHT_FORMAT): FULL_MATRIX,
+UPPER_ROW, LOWER_ROW, UPPER_DIAG_ROW, LOWER_DIAG_ROW y sus variantes _COL.
+
+* Las ciudades se enumeran de 0 a n-1, como en los estados del TSP.
+
+* El archivo se lee linea por linea, sin cargar el texto completo, de modo
+que la memoria necesaria es la de los arreglos resultantes.
+
+* Tambien se leen coordenadas guardadas como arreglo de NumPy (.npy), como
+las que escribe generate.py.
+
+* La matriz de distancias se puede guardar en un cache en disco, como .npy
+identificado por el hash del archivo, y abrir luego sin calcularla (ver
+TSPLIBInstance.distance_matrix()).
+
+* Para instancias demasiado grandes para una matriz densa, CoordDistances
+se comporta como la matriz de distancias pero calcula cada distancia a
+partir de las coordenadas cuando se la pide.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+import hashlib
+import os
+import re
+import tempfile
+from typing import Iterator
+import numpy as np
+
+# Tipos de distancia calculados a partir de coordenadas
+COORD_TYPES = ('EUC_2D', 'CEIL_2D', 'ATT', 'GEO')
+
+# Lineas de la forma "CLAVE : valor" o "CLAVE_SECTION"
+_KEYWORD = re.compile(r'^[^\S\n]*([A-Z][A-Z0-9_]*)[^\S\n]*(?::[^\S\n]*(.*?))?[^\S\n]*$', re.M)
+
+# Cantidad de distancias calculadas por bloque en distance_matrix()
+_BLOCK = 1 << 22
+
+# Cantidad de lineas de una seccion de datos convertidas por bloque en read()
+_LINES = 1 << 16
+
+
+class TSPLIBInstance:
+    """Clase que representa una instancia TSPLIB leida a arreglos de NumPy."""
+
+    def __init__(self, name: str, kind: str, coords: np.ndarray | None,
+                 weights: np.ndarray | None, path: str | None = None,
+                 digest: str | None = None) -> None:
+        """Construye una instancia.
+
+        Argumentos:
+        ==========
+        name: str
+            nombre de la instancia
+        kind: str
+            tipo de distancia (EDGE_WEIGHT_TYPE)
+        coords: np.ndarray | None
+            arreglo de n x 2 con las coordenadas de cada ciudad
+        weights: np.ndarray | None
+            matriz de n x n de distancias, solo si kind es EXPLICIT
+        path: str | None
+            ruta del archivo de la instancia
+        digest: str | None
+            hash SHA-256 del contenido del archivo, identifica la instancia
+            en el cache de distance_matrix()
+        """
+        if kind not in COORD_TYPES and kind != 'EXPLICIT':
+            raise ValueError("tipo de distancia no soportado: {}".format(kind))
+        if kind == 'EXPLICIT' and weights is None:
+            raise ValueError("falta EDGE_WEIGHT_SECTION")
+        if kind != 'EXPLICIT' and coords is None:
+            raise ValueError("falta NODE_COORD_SECTION")
+        self.name = name
+        self.kind = kind
+        self.coords = coords
+        self.weights = weights
+        self.n = len(weights) if weights is not None else len(coords)
+        self.path = path
+        self.digest = digest
+
+    def distance_matrix(self, cache: bool = False) -> np.ndarray:
+        """Construye la matriz de n x n de distancias, por bloques de filas.
+
+        Con cache, la matriz se guarda como .npy en el directorio __tspcache__
+        junto al archivo de la instancia, con el hash de su contenido en el
+        nombre. Las siguientes veces se abre con np.load(mmap_mode='r'), sin
+        calcular nada, y los procesos que la abren comparten las paginas.
+        Si el archivo de la instancia cambia, cambia el hash y se recalcula.
+
+        Argumentos:
+        ==========
+        cache: bool
+            si es True se usa el cache en disco (solo para instancias
+            definidas por coordenadas y leidas de un archivo)
+
+        Retorno:
+        =======
+        dist: np.ndarray
+            matriz de enteros con dist[u][v] = distancia entre u y v
+        """
+        if self.weights is not None:
+            return self.weights
+        if not cache or self.path is None or self.digest is None:
+            dist = np.empty((self.n, self.n), dtype=np.int64)
+            self._fill(dist)
+            return dist
+
+        folder = os.path.join(os.path.dirname(os.path.abspath(self.path)), '__tspcache__')
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        filename = os.path.join(folder, '{}.{}.npy'.format(name, self.digest[:16]))
+        if not os.path.exists(filename):
+            # Se calcula directo al disco y se renombra al final, para que otro
+            # proceso nunca abra un archivo a medio escribir
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix='.npy', dir=folder)
+            os.close(fd)
+            try:
+                dist = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.int64,
+                                                 shape=(self.n, self.n))
+                self._fill(dist)
+                dist.flush()
+                del dist
+                os.replace(tmp, filename)
+            except BaseException:
+                os.remove(tmp)
+                raise
+        return np.load(filename, mmap_mode='r')
+
+    def _fill(self, dist: np.ndarray) -> None:
+        """Calcula las distancias en una matriz de n x n ya creada."""
+        n = self.n
+        rows = max(1, _BLOCK // max(n, 1))
+        J = np.arange(n)
+        for start in range(0, n, rows):
+            I = np.arange(start, min(start + rows, n))
+            dist[I] = pair_distances(self.coords, I[:, None], J[None, :], self.kind)
+        np.fill_diagonal(dist, 0)
+
+
+class CoordDistances:
+    """Matriz de distancias virtual, calculada a partir de las coordenadas.
+
+    Se indexa como una matriz de NumPy: dist[u, v] con enteros retorna una
+    distancia y dist[I, J] con arreglos retorna las distancias de todos los
+    pares, calculadas de forma vectorizada. Ocupa O(n) mas el cache.
+
+    Las consultas de a una distancia (las que hacen los algoritmos que
+    recorren listas de candidatos) se guardan en un cache LRU acotado: cada
+    consulta mueve la distancia al final, y cuando se llena se descartan las
+    que hace mas tiempo que no se usan. Asi se conservan las mas consultadas,
+    como las de las aristas candidatas.
+    """
+
+    def __init__(self, coords: np.ndarray, kind: str = 'EUC_2D',
+                 cache_size: int = 1 << 20) -> None:
+        """Construye la matriz virtual.
+
+        Argumentos:
+        ==========
+        coords: np.ndarray
+            arreglo de n x 2 con las coordenadas de cada ciudad
+        kind: str
+            tipo de distancia, uno de COORD_TYPES
+        cache_size: int
+            cantidad maxima de distancias en el cache
+        """
+        if kind not in COORD_TYPES:
+            raise ValueError("tipo de distancia no soportado: {}".format(kind))
+        self.coords = coords
+        self.kind = kind
+        self.cache_size = cache_size
+        self.shape = (len(coords), len(coords))
+        self.dtype = np.dtype(np.int64)
+        self._cache = OrderedDict()
+
+    def __getitem__(self, key: tuple) -> np.int64 | np.ndarray:
+        """Distancia entre dos ciudades, o entre los pares de dos arreglos."""
+        u, v = key
+        if isinstance(u, (np.ndarray, list)) or isinstance(v, (np.ndarray, list)):
+            return pair_distances(self.coords, np.asarray(u), np.asarray(v), self.kind)
+        if u > v:
+            u, v = v, u
+        cache = self._cache
+        d = cache.get((u, v))
+        if d is not None:
+            cache.move_to_end((u, v))
+            return d
+        d = pair_distances(self.coords, u, v, self.kind)
+        if len(cache) >= self.cache_size:
+            cache.popitem(last=False)  # la usada hace mas tiempo
+        cache[u, v] = d
+        return d
+
+    def __len__(self) -> int:
+        """Cantidad de ciudades."""
+        return self.shape[0]
+
+
+def pair_distances(coords: np.ndarray, I: np.ndarray, J: np.ndarray, kind: str) -> np.ndarray:
+    """Calcula distancias TSPLIB entre pares de ciudades a partir de sus coordenadas.
+
+    Argumentos:
+    ==========
+    coords: np.ndarray
+        arreglo de n x 2 con las coordenadas de cada ciudad
+    I, J: np.ndarray
+        arreglos con los pares (I[k], J[k]), con formas compatibles
+        o dos ciudades, en cuyo caso se retorna una sola distancia
+    kind: str
+        tipo de distancia, uno de COORD_TYPES
+
+    Retorno:
+    =======
+    dist: np.ndarray
+        distancias como enteros de 64 bits
+    """
+    if kind == 'GEO':
+        lat_i, lon_i = _geo_radians(coords[I, 0]), _geo_radians(coords[I, 1])
+        lat_j, lon_j = _geo_radians(coords[J, 0]), _geo_radians(coords[J, 1])
+        q1 = np.cos(lon_i - lon_j)
+        q2 = np.cos(lat_i - lat_j)
+        q3 = np.cos(lat_i + lat_j)
+        arg = np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)
+        dist = (6378.388 * np.arccos(arg) + 1.0).astype(np.int64)
+        return np.where(np.equal(I, J), 0, dist)  # la formula da 1 para u = v
+
+    dx = coords[I, 0] - coords[J, 0]
+    dy = coords[I, 1] - coords[J, 1]
+    if kind == 'EUC_2D':
+        return (np.sqrt(dx * dx + dy * dy) + 0.5).astype(np.int64)
+    if kind == 'CEIL_2D':
+        return np.ceil(np.sqrt(dx * dx + dy * dy)).astype(np.int64)
+    if kind == 'ATT':
+        r = np.sqrt((dx * dx + dy * dy) / 10.0)
+        t = (r + 0.5).astype(np.int64)
+        return np.where(t < r, t + 1, t)
+    raise ValueError("tipo de distancia no soportado: {}".format(kind))
+
+
+def _geo_radians(x: np.ndarray) -> np.ndarray:
+    """Convierte coordenadas GEO (grados.minutos) a radianes, como indica TSPLIB."""
+    deg = np.trunc(x)
+    return 3.141592 * (deg + 5.0 * (x - deg) / 3.0) / 180.0
+
+
+def read(filename: str) -> TSPLIBInstance:
+    """Lee un archivo en formato ".tsp".
+
+    El archivo se recorre una sola vez, linea por linea: las especificaciones
+    se guardan a medida que aparecen y cada seccion de datos se convierte a
+    NumPy en bloques de _LINES lineas, sin tener el texto completo en memoria.
+
+    Tambien lee un arreglo de NumPy de n x 2 guardado como ".npy" (ver
+    generate.py), como una instancia EUC_2D con esas coordenadas.
+
+    Argumentos:
+    ==========
+    filename: str
+        ruta de la instancia
+
+    Retorno:
+    =======
+    instance: TSPLIBInstance
+        instancia con las coordenadas y/o la matriz de distancias
+    """
+    digest = hashlib.sha256()
+    if filename.endswith('.npy'):
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        coords = np.load(filename).astype(float)
+        name = os.path.splitext(os.path.basename(filename))[0]
+        return TSPLIBInstance(name, 'EUC_2D', coords, None, filename, digest.hexdigest())
+
+    # Separar las especificaciones de las secciones de datos
+    specs = {}
+    sections = {}
+    with open(filename, 'rb') as f:
+        lines = _lines(f, digest)
+        line = next(lines, None)
+        while line is not None:
+            m = _KEYWORD.match(line)
+            if m is None or m.group(1) == 'EOF':
+                line = next(lines, None)
+            elif m.group(1).endswith('_SECTION'):
+                sections[m.group(1)], line = _read_section(lines)
+            else:
+                specs[m.group(1)] = m.group(2) or ''
+                line = next(lines, None)
+
+    n = int(specs['DIMENSION'])
+    kind = specs.get('EDGE_WEIGHT_TYPE', 'EXPLICIT')
+
+    coords = None
+    if 'NODE_COORD_SECTION' in sections:
+        coords = _read_coords(sections['NODE_COORD_SECTION'], n)
+
+    weights = None
+    if kind == 'EXPLICIT' and 'EDGE_WEIGHT_SECTION' in sections:
+        fmt = specs.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX')
+        weights = _read_weights(sections['EDGE_WEIGHT_SECTION'], n, fmt)
+        if coords is None and 'DISPLAY_DATA_SECTION' in sections:
+            coords = _read_coords(sections['DISPLAY_DATA_SECTION'], n)
+
+    return TSPLIBInstance(specs.get('NAME', filename), kind, coords, weights,
+                          filename, digest.hexdigest())
+
+
+def _lines(f, digest) -> Iterator[str]:
+    """Recorre las lineas de un archivo binario, sumandolas al hash."""
+    for raw in f:
+        digest.update(raw)
+        yield raw.decode()
+
+
+def _read_section(lines: Iterator[str]) -> tuple[np.ndarray, str | None]:
+    """Lee los numeros de una seccion de datos, hasta la siguiente palabra clave.
+
+    Argumentos:
+    ==========
+    lines: Iterator[str]
+        lineas del archivo que siguen al encabezado de la seccion
+
+    Retorno:
+    =======
+    values: np.ndarray
+        numeros de la seccion, en orden, como float
+    line: str | None
+        linea de la siguiente palabra clave, o None si se termino el archivo
+    """
+    blocks = []
+    block = []
+    line = None
+    for line in lines:
+        if _KEYWORD.match(line):
+            break
+        block.append(line)
+        if len(block) >= _LINES:
+            blocks.append(np.fromstring(''.join(block), sep=' '))
+            block.clear()
+    else:
+        line = None
+    if block:
+        blocks.append(np.fromstring(''.join(block), sep=' '))
+    values = np.concatenate(blocks) if blocks else np.empty(0)
+    return values, line
+
+
+def _read_coords(values: np.ndarray, n: int) -> np.ndarray:
+    """Convierte los numeros de una seccion de lineas "ciudad x y" a un arreglo de n x 2."""
+    data = values.reshape(-1, 3)
+    if len(data) != n:
+        raise ValueError("se esperaban {} coordenadas, hay {}".format(n, len(data)))
+    coords = np.empty((n, 2))
+    coords[data[:, 0].astype(np.int64) - 1] = data[:, 1:]
+    return coords
+
+
+def _read_weights(values: np.ndarray, n: int, fmt: str) -> np.ndarray:
+    """Convierte los numeros de una EDGE_WEIGHT_SECTION a una matriz simetrica de n x n."""
+    if np.array_equal(values, np.round(values)):
+        values = values.astype(np.int64)
+
+    if fmt == 'FULL_MATRIX':
+        return values[:n * n].reshape(n, n)
+
+    # Un triangulo por columnas tiene el mismo orden que el opuesto por filas
+    triangles = {'UPPER_ROW': 'upper', 'LOWER_ROW': 'lower',
+                 'UPPER_DIAG_ROW': 'upper', 'LOWER_DIAG_ROW': 'lower',
+                 'UPPER_COL': 'lower', 'LOWER_COL': 'upper',
+                 'UPPER_DIAG_COL': 'lower', 'LOWER_DIAG_COL': 'upper'}
+    if fmt not in triangles:
+        raise ValueError("formato de matriz no soportado: {}".format(fmt))
+    diag = 'DIAG' in fmt
+    if triangles[fmt] == 'upper':
+        I, J = np.triu_indices(n, k=0 if diag else 1)
+    else:
+        I, J = np.tril_indices(n, k=0 if diag else -1)
+    if len(values) < len(I):
+        raise ValueError("faltan pesos en EDGE_WEIGHT_SECTION")
+    weights = np.zeros((n, n), dtype=values.dtype)
+    weights[I, J] = values[:len(I)]
+    weights[J, I] = values[:len(I)]
+    return weights
@@ -0,0 +1,29 @@
+"""Este modulo define la funcion find de un union-find (conjuntos disjuntos).
+
+Los conjuntos se representan con una lista parent, con parent[c] == c si c
+es la raiz de su conjunto; unir dos conjuntos es asignar parent[raiz] = otra
+raiz. Lo usan greedy edge (construct.py), el 1-tree de candidatos
+(bound.py) y la deteccion de subtours de BranchAndBound (search.py).
+"""
+
+
+def find(parent: list[int], c: int) -> int:
+    """Raiz del conjunto de c en un union-find, acortando el camino (path halving).
+
+    Argumentos:
+    ==========
+    parent: list[int]
+        padre de cada elemento, parent[c] == c si c es una raiz
+        se modifica en el lugar
+    c: int
+        un elemento
+
+    Retorno:
+    =======
+    root: int
+        raiz del conjunto de c
+    """
+    while parent[c] != c:
+        parent[c] = parent[parent[c]]
+        c = parent[c]
+    return c